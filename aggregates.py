@@ -0,0 +1,89 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import pandas as pd
+
+from utils import word_counts_by_class
+
+
+class SentimentAggregate:
+    """Running totals over analyzed batches.
+
+    Feed it result frames with ``update``; the dashboard metrics, charts and the
+    summary JSON read from here, so their cost depends on the number of distinct
+    labels and words rather than the number of rows.
+    """
+
+    def __init__(self, track_words: bool = True, keep_emojis: bool = True):
+        self.track_words = track_words
+        self.keep_emojis = keep_emojis
+        self.total = 0
+        self.sentiment_counts = Counter()
+        self.language_counts = Counter()
+        self.confidence_sum = 0.0
+        self.time_min = None
+        self.time_max = None
+        self.words = defaultdict(Counter)
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        return cls(**kwargs).update(df)
+
+    def update(self, df):
+        n = len(df)
+        if not n:
+            return self
+        self.total += n
+        self.sentiment_counts.update({k: int(v) for k, v in df["sentiment"].value_counts(sort=False).items() if v})
+        self.language_counts.update({k: int(v) for k, v in df["language"].value_counts(sort=False).items() if v})
+        self.confidence_sum += float(df["confidence"].sum())
+
+        # Bulk inputs (cli.py) may have no or unparseable timestamps
+        ts = pd.to_datetime(df["timestamp"], errors="coerce") if "timestamp" in df else None
+        if ts is not None and ts.notna().any():
+            lo, hi = ts.min(), ts.max()
+            self.time_min = lo if self.time_min is None else min(self.time_min, lo)
+            self.time_max = hi if self.time_max is None else max(self.time_max, hi)
+
+        if self.track_words:
+            counts = word_counts_by_class(df["clean_text"], df["sentiment"], keep_emojis=self.keep_emojis)
+            for sentiment, counter in counts.items():
+                self.words[sentiment].update(counter)
+        return self
+
+    def merge(self, other: "SentimentAggregate"):
+        self.total += other.total
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.language_counts.update(other.language_counts)
+        self.confidence_sum += other.confidence_sum
+        for attr, pick in (("time_min", min), ("time_max", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        for sentiment, counter in other.words.items():
+            self.words[sentiment].update(counter)
+        return self
+
+    @property
+    def average_confidence(self) -> float:
+        return self.confidence_sum / self.total if self.total else 0.0
+
+    def share(self, sentiment: str) -> float:
+        """Fraction of items with the given label (0..1)."""
+        return self.sentiment_counts.get(sentiment, 0) / self.total if self.total else 0.0
+
+    def top_words(self, sentiment: str, limit: int = 30) -> dict:
+        return dict(self.words[sentiment].most_common(limit)) if sentiment in self.words else {}
+
+    def to_summary(self, label: str) -> dict:
+        return {
+            "label": label,
+            "total_items": self.total,
+            "sentiment_counts": dict(self.sentiment_counts.most_common()),
+            "language_counts": dict(self.language_counts.most_common()),
+            "average_confidence": round(self.average_confidence, 3),
+            "time_window": {
+                "start": str(self.time_min) if self.time_min is not None else None,
+                "end": str(self.time_max) if self.time_max is not None else None,
+            },
+            "generated_at": datetime.now().isoformat(),
+        }
@@ -1,12 +1,27 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
 import json
-
-from data_collector import data_collector
-from sentiment_analyzer import batch_analyze
-from utils import color_for, build_summary_json, top_words, orient_xticks
+import os
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+
+from config import config
+from data_collector import MAX_COMMENTS_PER_POST, MIN_COMMENTS_PER_POST, data_collector
+from database import db
+from ingest import UPLOAD_TYPES, ProgressFile, detect_format, file_digest, iter_texts, text_stream
+from jobs import BackgroundAnalysis, JobStore, active_job, load_results
+from profiling import Profiler, activate, merge_snapshots, profiler
+from run_cache import build_run_cache, run_fingerprint, text_digest
+from session_store import SessionStore
+from trends import bucket_trend, downsample, smooth
+from sentiment_analyzer import result_version
+from aggregates import SentimentAggregate
+from utils import color_for, build_summary_json, orient_xticks
+
+# Large uploads can have many thousands of non-English rows; render only the first few
+TRANSLATIONS_SHOWN = 200
 
 # ---------------------------- Page and CSS ----------------------------
 st.set_page_config(page_title="Instagram Sentiment Analyzer", page_icon="📸", layout="wide")
@@ -37,12 +52,51 @@ st.markdown('<div class="intro">Analyze by hashtag, paste Instagram post URLs, o
 
 # ---------------------------- Session State ----------------------------
 if "sessions" not in st.session_state:
-    st.session_state["sessions"] = {}
+    # Saved runs live under a memory budget; older ones spill to disk and reload on demand
+    st.session_state["sessions"] = SessionStore(
+        config.SESSION_MEMORY_BUDGET_MB * 1024 * 1024,
+        os.path.join(config.SESSION_SPILL_DIR, uuid.uuid4().hex[:12]),
+    )
+if "run_cache" not in st.session_state:
+    st.session_state["run_cache"] = build_run_cache()
+if "job" not in st.session_state:
+    st.session_state["job"] = None
+if "profiler" not in st.session_state:
+    # Render timings of this session; each job records into its own profiler
+    st.session_state["profiler"] = Profiler(enabled=config.PROFILING_ENABLED)
+    st.session_state["job_perf"] = None
+session_profiler = st.session_state["profiler"]
+activate(session_profiler)
+if "session_id" not in st.session_state:
+    # Kept in the URL so a reload finds this session's jobs again; other sessions' jobs stay hidden
+    st.session_state["session_id"] = st.query_params.get("sid") or uuid.uuid4().hex[:12]
+st.query_params["sid"] = st.session_state["session_id"]
+job_store = JobStore(config.JOBS_DIR)
 if "current_df" not in st.session_state:
     st.session_state["current_df"] = None
+if "current_agg" not in st.session_state:
+    st.session_state["current_agg"] = None
 if "current_meta" not in st.session_state:
     st.session_state["current_meta"] = {"source": None, "label": None, "mode": None}
 
+
+
+def collector_batches(spec: dict):
+    """Batches of a seeded collector described by ``spec``; the same spec yields the same batches."""
+    now = datetime.fromisoformat(spec["now"])
+    if spec["source"] == "Hashtag":
+        return data_collector.iter_hashtag_data(spec["hashtag"], spec["limit"], include_posts=spec["posts"],
+                                                include_comments=spec["comments"], seed=spec["seed"], now=now)
+    return data_collector.iter_from_urls(spec["urls"], include_posts=spec["posts"],
+                                         include_comments=spec["comments"], seed=spec["seed"], now=now)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def stored_counts() -> dict:
+    """Saved sentiment counts per hashtag; cached, and cleared when a run finishes."""
+    return db.sentiment_counts_by_hashtag()
+
+
 # ---------------------------- Sidebar (inputs shown before submit) ----------------------------
 with st.sidebar:
     st.header("Controls")
@@ -57,6 +111,9 @@ with st.sidebar:
     limit = 50
     url_text = ""
     pasted = ""
+    upload = None
+    text_field = ""
+    upload_format = None
 
     if source_type == "Hashtag":
         hashtag = st.selectbox("Hashtag", options=data_collector.get_available_hashtags(), index=0)
@@ -75,18 +132,76 @@ with st.sidebar:
     else:  # Paste Comments
         pasted = st.text_area("Paste comments (one per line, Hindi/English/Hinglish supported)",
                               placeholder="Kya mast reel hai yrr! 🔥\nNot impressed tbh\nयह बहुत अच्छा है!\nPretty decent but could be better.", height=220)
+        upload = st.file_uploader("...or upload a file (TXT: one comment per line; CSV/JSONL: one per row)",
+                                  type=UPLOAD_TYPES)
+        if upload is not None:
+            text_field = st.text_input("Text column (CSV/JSONL)", value="", help="Leave blank to auto-detect.")
         analyze_mode = "Comments"
 
+    seed = int(st.number_input("Seed", min_value=0, value=config.DEFAULT_SEED, step=1,
+                               help="Same inputs and seed give the same sample data."))
+    force_refresh = st.checkbox("Force refresh", value=False, help="Ignore cached results and run again.")
+    session_profiler.enabled = st.checkbox("Collect performance stats", value=config.PROFILING_ENABLED)
     run = st.button("Start Analysis", use_container_width=True)
 
+    if config.PERSIST_RESULTS:
+        # Expander bodies run even when collapsed, i.e. on every progress poll
+        with st.expander("Stored results"):
+            stored = stored_counts()
+            if not stored:
+                st.caption("Nothing saved yet.")
+            for tag, counts in stored.items():
+                st.caption(f"{tag}: " + " • ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+
+    with st.expander("Jobs"):
+        recent_jobs = job_store.list(session=st.session_state["session_id"])[:10]
+        if not recent_jobs:
+            st.caption("No jobs yet.")
+        for m in recent_jobs:
+            jid, live = m["job_id"], active_job(m["job_id"])
+            # A manifest still marked collecting/analyzing with no live worker was interrupted
+            status = "running" if live else m["status"] if m["status"] in ("done", "failed", "cancelled") else "interrupted"
+            st.caption(f"{m['meta'].get('label')} • {m['meta'].get('mode')} — {status}, "
+                       f"{m['done_items']}/{m['items']} items")
+            left, right = st.columns(2)
+            if live is not None:
+                if left.button("View", key=f"view-{jid}"):
+                    st.session_state["job"] = live
+            elif status in ("interrupted", "cancelled") and (m["inputs_complete"] or m["meta"].get("collect")):
+                if left.button("Resume", key=f"resume-{jid}"):
+                    # Input that was still being collected is collected again; uploads and pastes can't be
+                    spec = None if m["inputs_complete"] else m["meta"]["collect"]
+                    session_profiler.reset()
+                    st.session_state["job"] = BackgroundAnalysis.resume(
+                        job_store, jid, batches=collector_batches(spec) if spec else None,
+                        profile=session_profiler.enabled).start()
+            elif status == "done" and left.button("Open", key=f"open-{jid}"):
+                opened = load_results(job_store, jid)
+                if opened is not None:
+                    st.session_state["current_df"] = opened
+                    st.session_state["current_agg"] = SentimentAggregate.from_frame(opened)
+                    st.session_state["current_meta"] = {"source": m["meta"].get("source"), "label": m["meta"].get("label"),
+                                                        "mode": m["meta"].get("mode"), "run_id": jid}
+            if live is None and right.button("Delete", key=f"delete-{jid}"):
+                job_store.delete(jid)
+                st.rerun()
+
 # ---------------------------- Run or Reuse ----------------------------
 if run:
+    want_posts = analyze_mode in ("Captions", "Both")
+    want_comments = analyze_mode in ("Comments", "Both") and include_comments
+    avg_comments = (MIN_COMMENTS_PER_POST + MAX_COMMENTS_PER_POST) / 2
+    max_lines = config.MAX_COMMENT_LINES or None
+    progress_fn = None
+    collect = None
+
     if source_type == "Hashtag":
-        posts, comments = data_collector.collect_hashtag_data(hashtag, limit, include_comments=include_comments)
+        collect = {"source": source_type, "hashtag": hashtag, "limit": limit, "posts": want_posts,
+                   "comments": want_comments, "seed": seed, "now": datetime.now().isoformat()}
+        batches = collector_batches(collect)
+        digest = None
+        expected = limit * (int(want_posts) + (avg_comments if want_comments else 0))
         label = f"#{hashtag}"
-        if analyze_mode == "Captions": items = posts
-        elif analyze_mode == "Comments": items = comments
-        else: items = posts + comments
 
     elif source_type == "Post URLs":
         urls = [u.strip() for u in (url_text or "").splitlines() if u.strip()]
@@ -94,94 +209,175 @@ if run:
             st.error("Please paste at least one Instagram post URL.")
             st.stop()
         shortcodes = [data_collector.extract_shortcode(u) for u in urls]
-        valid = [c for c in shortcodes if c]
+        valid = list(dict.fromkeys(c for c in shortcodes if c))
         if not valid:
             st.error("Couldn’t extract any valid post IDs. Each URL should look like https://www.instagram.com/p/XXXXXXXXXX/ or /reel/XXXXXXXXXX/. Subdomains m./www. and query params are fine.")
             st.stop()
-        st.info(f"Detected {len(valid)} valid post link(s).")
-        posts, comments = data_collector.collect_from_urls(urls, include_comments=include_comments)
-        label = f"{len(posts)} URL post(s)"
-        if analyze_mode == "Captions": items = posts
-        elif analyze_mode == "Comments": items = comments
-        else: items = posts + comments
+        repeats = sum(1 for c in shortcodes if c) - len(valid)
+        st.info(f"Detected {len(valid)} valid post link(s)." + (f" {repeats} repeated link(s) skipped." if repeats else ""))
+        collect = {"source": source_type, "urls": urls, "posts": want_posts, "comments": want_comments, "seed": seed,
+                   "now": datetime.now().isoformat()}
+        batches = collector_batches(collect)
+        digest = text_digest("\n".join(urls))
+        expected = len(valid) * (int(want_posts) + (avg_comments if want_comments else 0))
+        label = f"{len(valid)} URL post(s)"
 
     else:  # Paste Comments
-        lines = [ln for ln in (pasted or "").splitlines() if ln.strip()]
-        if not lines:
-            st.error("Please paste at least one comment line.")
-            st.stop()
-        # Cap extremely large pastes for responsiveness
-        if len(lines) > 1000:
-            lines = lines[:1000]
-            st.warning("Truncated to first 1000 comments for performance.")
-        _, comments = data_collector.build_from_pasted_comments(lines)
-        label = f"{len(comments)} pasted comment(s)"
-        items = comments
-
-    if not items:
+        if upload is not None:
+            # Stream the upload: decoded and split a chunk at a time, progress by bytes consumed
+            digest = file_digest(upload)
+            source = ProgressFile(upload, upload.size)
+            upload_format = detect_format(upload.name, "txt")
+            texts = iter_texts(text_stream(source), upload_format, text_field.strip() or None)
+            progress_fn = lambda: source.fraction
+            expected = None
+            label = upload.name
+        else:
+            lines = [ln for ln in (pasted or "").splitlines() if ln.strip()]
+            if not lines:
+                st.error("Please paste at least one comment line or upload a file.")
+                st.stop()
+            digest = text_digest("\n".join(lines))
+            texts = lines
+            expected = min(len(lines), max_lines or len(lines))
+            label = f"{expected} pasted comment(s)"
+        batches = data_collector.iter_pasted_comments(islice(texts, max_lines), seed=seed)
+
+    run_key = run_fingerprint(
+        source=source_type, hashtag=hashtag,
+        limit=limit if source_type == "Hashtag" else max_lines if source_type == "Paste Comments" else None,
+        include_comments=include_comments, mode=analyze_mode, input=digest, seed=seed,
+        # The same upload bytes read as another format or column give different texts
+        format=upload_format, text_field=text_field.strip() if upload_format else None,
+        analyzer=result_version(), translation=config.TRANSLATION_BACKEND,
+        dedup=(config.DEDUP_THRESHOLD, config.DEDUP_SHINGLE_SIZE) if config.DEDUP_ENABLED else None,
+    )
+    run_cache = st.session_state["run_cache"]
+    cached = None
+    if run_cache is not None:
+        if force_refresh:
+            run_cache.invalidate(run_key)
+        else:
+            cached = run_cache.get(run_key)
+
+if run and cached is not None:
+    # Identical inputs: reuse the finished result set, no collection or analysis
+    df, cached_meta = cached
+    st.session_state["current_df"] = df
+    st.session_state["current_agg"] = SentimentAggregate.from_frame(df)
+    st.session_state["current_meta"] = {"source": source_type, "label": label, "mode": analyze_mode,
+                                        "run_id": cached_meta.get("run_id")}
+    st.session_state["sessions"].put(f"{source_type}|{label}|{analyze_mode}", df)
+    st.session_state["job_perf"] = None
+    st.success("Loaded cached result for identical inputs. Tick \"Force refresh\" to run again.")
+
+elif run:
+    # Collect -> analyze -> persist runs on a worker thread; this script polls it between reruns
+    if st.session_state["job"] is not None:
+        st.session_state["job"].cancel()
+    session_profiler.reset()
+    job_store.prune(config.JOBS_KEEP)
+    if config.PERSIST_RESULTS:
+        db.prune_runs(config.RESULTS_KEEP_RUNS, protect=[m["job_id"] for m in job_store.list() if m["status"] != "done"])
+        stored_counts.clear()
+    st.session_state["job"] = BackgroundAnalysis(
+        batches, expected=expected, progress_fn=progress_fn, store=job_store, profile=session_profiler.enabled,
+        replayable=collect is not None,
+        meta={"source": source_type, "label": label, "mode": analyze_mode, "run_key": run_key, "limit": max_lines,
+              "session": st.session_state["session_id"], "collect": collect, "expected": expected},
+    ).start()
+
+job = st.session_state["job"]
+if job is not None and not job.done:
+    snap = job.snapshot()
+    if snap["phase"] == "collecting":
+        text = f"Collecting... {snap['collected']} items" + (f", {snap['items']} analyzed" if snap["items"] else "")
+    else:
+        text = f"Analyzing sentiment... {snap['items']} items"
+    st.progress(job.progress(), text=text)
+    if snap["sentiment_counts"]:
+        st.bar_chart(pd.Series(snap["sentiment_counts"]))
+    if st.button("Cancel analysis"):
+        job.cancel()
+    time.sleep(0.5)
+    st.rerun()
+elif job is not None:
+    st.session_state["job"] = None
+    stored_counts.clear()
+    st.session_state["job_perf"] = job.profiler.snapshot() if job.profiler.enabled else None
+    df = job.result()
+    if job.status == "failed":
+        st.error(f"Analysis failed: {job.error}")
+    elif df is None:
         st.warning("No items to analyze. Try different inputs.")
-        st.stop()
-
-    # Analyze in batches for stability on large inputs
-    with st.spinner("Analyzing sentiment..."):
-        chunk = 400
-        results_all = []
-        for i in range(0, len(items), chunk):
-            results_all.extend(batch_analyze(items[i:i+chunk]))
-
-    df = pd.DataFrame(results_all)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-    # Accuracy tweak: recalibrate final label with VADER/TextBlob ensemble
-    def _refine(row):
-        comp = float(row.get("vader_compound", 0))
-        tb = float(row.get("textblob_polarity", 0))
-        neutral_band = 0.06
-        w = 0.6*comp + 0.4*tb
-        if w >= neutral_band: return "Positive"
-        if w <= -neutral_band: return "Negative"
-        return "Neutral"
-    df["sentiment"] = df.apply(_refine, axis=1)
-    df["confidence"] = (df["vader_compound"].abs() * 0.6 + df["textblob_polarity"].abs() * 0.4).round(3)
-
-    st.session_state["current_df"] = df.copy()
-    st.session_state["current_meta"] = {"source": source_type, "label": label, "mode": analyze_mode}
+    else:
+        meta = job.meta
+        st.session_state["current_df"] = df
+        st.session_state["current_agg"] = job.agg
+        st.session_state["current_meta"] = {"source": meta["source"], "label": meta["label"],
+                                            "mode": meta["mode"], "run_id": job.run_id}
+        st.session_state["sessions"].put(f"{meta['source']}|{meta['label']}|{meta['mode']}", df)
+        if job.status == "cancelled":
+            st.warning(f"Analysis cancelled; showing the {len(df)} items analyzed so far.")
+        else:
+            if meta["source"] == "Paste Comments" and meta["limit"] and len(df) >= meta["limit"]:
+                st.warning(f"Stopped at {meta['limit']} comments (MAX_COMMENT_LINES).")
+            if st.session_state["run_cache"] is not None:
+                st.session_state["run_cache"].put(meta["run_key"], df, {"run_id": job.run_id, "label": meta["label"]})
 
 # ---------------------------- Visualize ----------------------------
 if st.session_state["current_df"] is not None:
-    df = st.session_state["current_df"].copy()
+    # Plotting libraries are only needed once there is something to draw
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    df = st.session_state["current_df"]
+    agg = st.session_state["current_agg"]
     meta = st.session_state["current_meta"]
     label = meta["label"]
     analyze_mode = meta["mode"]
 
     st.success(f"Analyzed {len(df)} items • Source: {label} • Mode: {analyze_mode}")
 
-    session_key = f"{meta['source']}|{label}|{analyze_mode}"
-    st.session_state["sessions"][session_key] = df.copy()
-
-    cmetric = st.columns(4)
-    with cmetric[0]: st.markdown(f'<div class="metric">Total Items<br><span style="font-size:26px;font-weight:800;">{len(df)}</span></div>', unsafe_allow_html=True)
-    with cmetric[1]:
-        pct_pos = (df["sentiment"].eq("Positive").mean()*100) if len(df) else 0
-        st.markdown(f'<div class="metric">Positive %<br><span style="font-size:26px;font-weight:800;">{pct_pos:.1f}%</span></div>', unsafe_allow_html=True)
-    with cmetric[2]:
-        pct_neg = (df["sentiment"].eq("Negative").mean()*100) if len(df) else 0
-        st.markdown(f'<div class="metric">Negative %<br><span style="font-size:26px;font-weight:800;">{pct_neg:.1f}%</span></div>', unsafe_allow_html=True)
-    with cmetric[3]:
-        avgc = df["confidence"].mean() if len(df) else 0
-        st.markdown(f'<div class="metric">Avg Confidence<br><span style="font-size:26px;font-weight:800;">{avgc:.2f}</span></div>', unsafe_allow_html=True)
+    with profiler.stage("app.metrics"):
+        cmetric = st.columns(4)
+        with cmetric[0]: st.markdown(f'<div class="metric">Total Items<br><span style="font-size:26px;font-weight:800;">{agg.total}</span></div>', unsafe_allow_html=True)
+        with cmetric[1]:
+            pct_pos = agg.share("Positive") * 100
+            st.markdown(f'<div class="metric">Positive %<br><span style="font-size:26px;font-weight:800;">{pct_pos:.1f}%</span></div>', unsafe_allow_html=True)
+        with cmetric[2]:
+            pct_neg = agg.share("Negative") * 100
+            st.markdown(f'<div class="metric">Negative %<br><span style="font-size:26px;font-weight:800;">{pct_neg:.1f}%</span></div>', unsafe_allow_html=True)
+        with cmetric[3]:
+            avgc = agg.average_confidence
+            st.markdown(f'<div class="metric">Avg Confidence<br><span style="font-size:26px;font-weight:800;">{avgc:.2f}</span></div>', unsafe_allow_html=True)
+
+    if "dup_group" in df:
+        with st.expander("🤖 Near-duplicate waves"), profiler.stage("app.duplicates"):
+            sizes = df["dup_group"].value_counts()
+            waves = sizes[sizes >= config.DEDUP_WAVE_SIZE]
+            st.caption(f"{len(sizes)} distinct comments after collapsing near-duplicates • "
+                       f"{len(waves)} waves of {config.DEDUP_WAVE_SIZE}+ covering {int(waves.sum())} items")
+            if len(waves):
+                first = df.drop_duplicates("dup_group").set_index("dup_group")["sentiment"]
+                st.dataframe(pd.DataFrame({"Comment": waves.index[:20].astype(str), "Copies": waves.values[:20],
+                                           "Sentiment": first.reindex(waves.index[:20]).astype(str).values}),
+                             use_container_width=True, hide_index=True)
+                # Down-weighted view: every group counts once, so a bot wave can't swing the shares
+                once = first.value_counts(normalize=True).mul(100).round(1)
+                raw = df["sentiment"].value_counts(normalize=True).mul(100).round(1)
+                st.dataframe(pd.DataFrame({"All items %": raw, "One per group %": once}), use_container_width=True)
 
     c1, c2 = st.columns(2)
-    with c1:
-        counts = df["sentiment"].value_counts()
+    with c1, profiler.stage("app.chart_sentiment"):
+        counts = pd.Series(dict(agg.sentiment_counts.most_common()))
         fig = px.pie(values=counts.values, names=counts.index, title="Sentiment Distribution",
                      color=counts.index, color_discrete_map={s: color_for(s) for s in counts.index})
         fig.update_traces(textinfo="percent+label")
         st.plotly_chart(fig, use_container_width=True)
 
-    with c2:
-        lang_counts = df["language"].replace({"en": "EN", "hi": "HI", "mixed": "Mixed"})
-        lang_ct = lang_counts.value_counts()
+    with c2, profiler.stage("app.chart_language"):
+        lang_ct = pd.Series(dict(agg.language_counts.most_common())).rename(index={"en": "EN", "hi": "HI", "hinglish": "Hinglish", "mixed": "Mixed"})
         fig2 = px.bar(x=lang_ct.index, y=lang_ct.values, title="Language Distribution")
         fig2.update_traces(marker_color=["#4c78a8"] * len(lang_ct))
         fig2.update_layout(yaxis_title="Count", xaxis_title="Language")
@@ -189,49 +385,79 @@ if st.session_state["current_df"] is not None:
         st.plotly_chart(fig2, use_container_width=True)
 
     st.markdown("### ⏱️ Sentiment Over Time")
-    dft = df.sort_values("timestamp").copy()
-    dft["sentiment_score"] = dft["sentiment"].map({"Positive": 1, "Neutral": 0, "Negative": -1})
-    max_items = int(min(400, max(1, len(dft))))  # higher smoothing ceiling
-    roll = st.slider("Smoothing window (items)", 1, max_items, min(25, max_items))
-    dft["smoothed"] = dft["sentiment_score"].rolling(roll, min_periods=1).mean()
-    figt = go.Figure()
-    figt.add_scatter(x=dft["timestamp"], y=dft["smoothed"], mode="lines+markers",
-                     name="Trend", line=dict(color="#6aa0ff", width=3), marker=dict(size=6))
-    figt.update_layout(template="plotly_dark", height=380, yaxis_title="Sentiment (-1..1)", xaxis_title="Time")
-    st.plotly_chart(figt, use_container_width=True)
+    with profiler.stage("app.chart_trend", len(df)):
+        # Bucketing is the only per-row step; do it once per result set, smoothing works on buckets
+        cached_trend = st.session_state.get("trend")
+        if cached_trend is None or cached_trend[0] is not df:
+            cached_trend = (df, bucket_trend(df))
+            st.session_state["trend"] = cached_trend
+        trend = cached_trend[1]
+        if trend.empty:
+            st.info("No timestamps to plot.")
+        else:
+            roll = 1
+            if len(trend) > 1:
+                roll = st.slider("Smoothing window (time buckets)", 1, len(trend), min(5, len(trend)))
+            shown = downsample(trend.assign(smoothed=smooth(trend, roll)), "smoothed")
+            figt = go.Figure()
+            figt.add_scatter(x=shown.index, y=shown["smoothed"], customdata=shown["count"],
+                             mode="lines+markers" if len(shown) <= 200 else "lines",
+                             hovertemplate="%{x}<br>score %{y:.2f}<br>%{customdata} items<extra></extra>",
+                             name="Trend", line=dict(color="#6aa0ff", width=3), marker=dict(size=6))
+            figt.update_layout(template="plotly_dark", height=380, yaxis_title="Sentiment (-1..1)", xaxis_title="Time")
+            st.plotly_chart(figt, use_container_width=True)
+            st.caption(f"{trend.attrs['freq']} buckets • {len(trend)} buckets, {len(shown)} points drawn")
 
     st.markdown("### ☁️ Top Words")
-    cw1, cw2 = st.columns(2)
-    pos_words = top_words(df.loc[df["sentiment"] == "Positive", "clean_text"], limit=30, keep_emojis=True)
-    neg_words = top_words(df.loc[df["sentiment"] == "Negative", "clean_text"], limit=30, keep_emojis=True)
-    with cw1:
-        figpw = px.bar(x=list(pos_words.keys())[:30], y=list(pos_words.values())[:30],
-                       title="Positive Words", color=list(pos_words.values())[:30], color_continuous_scale="Greens")
-        figpw = orient_xticks(figpw, angle=-45)
-        st.plotly_chart(figpw, use_container_width=True)
-    with cw2:
-        fignw = px.bar(x=list(neg_words.keys())[:30], y=list(neg_words.values())[:30],
-                       title="Negative Words", color=list(neg_words.values())[:30], color_continuous_scale="Reds")
-        fignw = orient_xticks(fignw, angle=-45)
-        st.plotly_chart(fignw, use_container_width=True)
+    with profiler.stage("app.chart_words"):
+        cw1, cw2 = st.columns(2)
+        pos_words = agg.top_words("Positive", limit=30)
+        neg_words = agg.top_words("Negative", limit=30)
+        with cw1:
+            figpw = px.bar(x=list(pos_words.keys())[:30], y=list(pos_words.values())[:30],
+                           title="Positive Words", color=list(pos_words.values())[:30], color_continuous_scale="Greens")
+            figpw = orient_xticks(figpw, angle=-45)
+            st.plotly_chart(figpw, use_container_width=True)
+        with cw2:
+            fignw = px.bar(x=list(neg_words.keys())[:30], y=list(neg_words.values())[:30],
+                           title="Negative Words", color=list(neg_words.values())[:30], color_continuous_scale="Reds")
+            fignw = orient_xticks(fignw, angle=-45)
+            st.plotly_chart(fignw, use_container_width=True)
 
     st.markdown("### 🌐 Translations")
-    with st.expander("Show translations for non-English items"):
+    with st.expander("Show translations for non-English items"), profiler.stage("app.translations"):
         non_en = df[df["language"] != "en"]
         if len(non_en) == 0:
             st.info("No non-English items detected.")
         else:
-            for _, r in non_en.iterrows():
+            if len(non_en) > TRANSLATIONS_SHOWN:
+                st.caption(f"Showing {TRANSLATIONS_SHOWN} of {len(non_en)} non-English items.")
+            for _, r in non_en.head(TRANSLATIONS_SHOWN).iterrows():
                 st.markdown(f"**{r['sentiment']} ({r['confidence']:.0%})** — {r['text']}")
-                if r.get("translated_text"):
+                if pd.notna(r.get("translated_text")):
                     st.caption(f"Translation: {r['translated_text']}")
                 st.divider()
 
     st.markdown("### 📥 Export")
-    summary = build_summary_json(df, label)
+    with profiler.stage("app.summary"):
+        summary = build_summary_json(agg, label)
+    perf = merge_snapshots(st.session_state["job_perf"], session_profiler.snapshot())
+    if session_profiler.enabled:
+        summary["performance"] = perf
     st.download_button("Download Summary JSON", data=json.dumps(summary, indent=2),
                        file_name=f"summary_{label.replace('#','')}.json", mime="application/json")
 
+    if session_profiler.enabled:
+        with st.expander("Performance"):
+            if perf["stages"]:
+                st.dataframe(pd.DataFrame.from_dict(perf["stages"], orient="index")
+                             .drop(columns=["histogram"]), use_container_width=True)
+                stage = st.selectbox("Latency histogram", list(perf["stages"]), key="perf_stage")
+                hist = perf["stages"][stage]["histogram"]
+                st.bar_chart(pd.Series(hist, name="calls"))
+            if perf["counters"]:
+                st.json(perf["counters"])
+
     st.markdown("### 🔄 Compare Saved Sessions")
     if st.session_state["sessions"]:
         keys = list(st.session_state["sessions"].keys())
@@ -239,8 +465,8 @@ if st.session_state["current_df"] is not None:
             k1 = st.selectbox("Session A", keys, index=0, key="cmp_a")
             k2 = st.selectbox("Session B", keys, index=1, key="cmp_b")
             if k1 != k2:
-                dfa = st.session_state["sessions"][k1]
-                dfb = st.session_state["sessions"][k2]
+                dfa = st.session_state["sessions"].get(k1)
+                dfb = st.session_state["sessions"].get(k2)
                 comp = pd.DataFrame({
                     "Session": [k1, k2],
                     "Total": [len(dfa), len(dfb)],
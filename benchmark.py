@@ -0,0 +1,411 @@
+"""Throughput benchmarks for the analysis pipeline.
+
+Usage:
+  python benchmark.py stages [--sizes 10000,100000,1000000] [--seed 7] [--output results.json]
+                             [--baseline baseline.json] [--save-baseline] [--tolerance 0.25]
+                             [--repeats 5] [--min-delta-ms 5]
+  python benchmark.py reports [--posts 200] [--seed 7] [--workers N]
+
+"stages" times every pipeline stage on its own over seeded corpora and writes
+machine-readable results. Each stage is run up to --repeats times (fewer once
+its runs add up to STAGE_BUDGET_S) and the fastest run counts. With --baseline
+it flags stages whose throughput dropped by more than --tolerance and that got
+slower by at least --min-delta-ms, then exits non-zero. "reports" runs the
+side-by-side comparisons (row vs columnar, pool, cascade, lexicon engine vs
+the ensemble, language routing, top_words engines, cold start).
+"""
+import argparse
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+import sentiment_analyzer
+from config import config
+from data_collector import HINGLISH_PHRASES, _random_comment_text, data_collector, generate_corpus
+from dedup import near_duplicate_groups
+from profiling import Profiler, use_profiler
+from sentiment_analyzer import (analyze_frame, batch_analyze, clean_text, detect_languages, ensemble_scores,
+                                get_langid, get_lexicon, get_textblob, get_vader,
+                                resolve_workers)
+from trends import bucket_trend, downsample, smooth
+from utils import (EMOJI_PATTERN, EN_STOPS, HI_STOPS, NOISE, build_summary_json, top_words,
+                   top_words_by_class)
+
+DEFAULT_SIZES = "10000,100000,1000000"
+# Per-item scorers (VADER, TextBlob, end-to-end analysis) run on at most this many items
+DEFAULT_MAX_SCORED = 20000
+# Runs per stage; a stage stops repeating once its runs took this long in total
+DEFAULT_REPEATS = 5
+STAGE_BUDGET_S = 1.0
+# Slowdowns smaller than this are timer noise on millisecond stages, whatever the ratio
+DEFAULT_MIN_DELTA_MS = 5.0
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def _items(posts: int, seed: int):
+    random.seed(seed)
+    captions, comments = data_collector.collect_hashtag_data("food", posts, include_comments=True)
+    return captions + comments
+
+
+def bench_batch_paths(items):
+    """Row-dict batch_analyze + DataFrame vs the columnar analyze_frame."""
+    def row_path():
+        return pd.DataFrame(batch_analyze(items))
+
+    def frame_path():
+        base = pd.DataFrame(items)
+        return pd.concat([base, analyze_frame(base)], axis=1)
+
+    _, t_rows = _timed(row_path)
+    _, t_frame = _timed(frame_path)
+    n = len(items)
+    return {
+        "items": n,
+        "unique_texts": len({it["text"] for it in items}),
+        "batch_analyze_s": round(t_rows, 3),
+        "analyze_frame_s": round(t_frame, 3),
+        "batch_analyze_items_per_s": round(n / t_rows, 1) if t_rows else None,
+        "analyze_frame_items_per_s": round(n / t_frame, 1) if t_frame else None,
+        "speedup": round(t_rows / t_frame, 2) if t_frame else None,
+    }
+
+
+def bench_parallel(items, workers: int):
+    """analyze_frame on one core vs across a process pool."""
+    texts = [it["text"] for it in items]
+    _, t_serial = _timed(analyze_frame, texts, workers=1)
+    _, t_pool = _timed(analyze_frame, texts, workers=workers)
+    return {
+        "workers": workers,
+        "serial_s": round(t_serial, 3),
+        "pool_s": round(t_pool, 3),
+        "speedup": round(t_serial / t_pool, 2) if t_pool else None,
+    }
+
+
+def bench_cascade(items, thresholds=(0.3, 0.5, 0.7, 0.9)):
+    """Cascade mode vs the full ensemble: speedup and label agreement per VADER threshold."""
+    texts = [it["text"] for it in items]
+    full, t_full = _timed(analyze_frame, texts, workers=1, mode="full")
+    rows = []
+    for th in thresholds:
+        fast, t_fast = _timed(analyze_frame, texts, workers=1, mode="cascade", cascade_threshold=th)
+        rows.append({
+            "threshold": th,
+            "full_s": round(t_full, 3),
+            "cascade_s": round(t_fast, 3),
+            "speedup": round(t_full / t_fast, 2) if t_fast else None,
+            "agreement_pct": round(float((fast["sentiment"] == full["sentiment"]).mean()) * 100, 2),
+            "decided_by_vader_pct": round(float((fast["decided_by"] == "vader").mean()) * 100, 2),
+        })
+    return rows
+
+
+def bench_engines(items):
+    """Lexicon engine vs the VADER/TextBlob ensemble: speed and label agreement, overall and on Hinglish."""
+    texts = [it["text"] for it in items]
+    get_lexicon()  # table build is a one-off, like warm_up() for the ensemble
+    ensemble, t_ensemble = _timed(analyze_frame, texts, workers=1, engine="ensemble")
+    lexicon, t_lexicon = _timed(analyze_frame, texts, workers=1, engine="lexicon")
+    same = (lexicon["sentiment"] == ensemble["sentiment"]).to_numpy()
+    hinglish = pd.Series(texts).str.contains("|".join(HINGLISH_PHRASES), regex=True).to_numpy()
+    return {
+        "items": len(texts),
+        "ensemble_s": round(t_ensemble, 3),
+        "lexicon_s": round(t_lexicon, 3),
+        "speedup": round(t_ensemble / t_lexicon, 2) if t_lexicon else None,
+        "agreement_pct": round(float(same.mean()) * 100, 2),
+        "hinglish_items": int(hinglish.sum()),
+        "hinglish_agreement_pct": round(float(same[hinglish].mean()) * 100, 2) if hinglish.any() else None,
+    }
+
+
+def bench_routing(items):
+    """Ensemble with and without language routing: time, translation requests and the language mix."""
+    texts = [it["text"] for it in items]
+    saved = config.LANGID_ROUTING
+    out = {}
+    try:
+        for routing in (False, True):
+            config.LANGID_ROUTING = routing
+            with use_profiler(Profiler(enabled=True)) as counted:
+                frame, seconds = _timed(analyze_frame, texts, workers=1, engine="ensemble")
+            counters = counted.snapshot()["counters"]
+            key = "routed" if routing else "unrouted"
+            out[f"{key}_s"] = round(seconds, 3)
+            out[f"{key}_translation_requests"] = counters.get("analyze.translation_requests", 0)
+            out[f"{key}_lexicon_items"] = counters.get("analyze.lexicon_routed", 0)
+        out["languages"] = {k: int(v) for k, v in frame["language"].value_counts().items()}
+    finally:
+        config.LANGID_ROUTING = saved
+    return out
+
+
+def _legacy_top_words(texts, limit=80, keep_emojis=False):
+    # The original per-text implementation, kept as the reference output
+    stops = EN_STOPS | HI_STOPS | NOISE
+    word_counts = Counter()
+    for t in texts:
+        s = re.sub(r"http\S+|www\.\S+", " ", str(t))
+        s = re.sub(r"@\w+", " ", s)
+        s = re.sub(r"#(\w+)", r"\1", s)
+        tokens = []
+        if keep_emojis:
+            tokens.extend(EMOJI_PATTERN.findall(s))
+            s = EMOJI_PATTERN.sub(" ", s)
+        for w in re.split(r"[^a-z\u0900-\u097F]+", s.lower()):
+            if w and w not in stops and len(w) > 2:
+                tokens.append(w)
+        for tok in tokens:
+            word_counts[tok] += 1
+    return dict(word_counts.most_common(limit))
+
+
+def bench_top_words(texts, labels, workers: int):
+    """Every top_words engine against the legacy implementation; fails loudly on any mismatch."""
+    out = {"texts": len(texts)}
+    classes = list(dict.fromkeys(labels))
+    expected, t_legacy = _timed(
+        lambda: {c: _legacy_top_words([t for t, l in zip(texts, labels) if l == c], 30, True) for c in classes})
+    out["legacy_s"] = round(t_legacy, 3)
+    engines = {
+        "python": lambda: {c: top_words([t for t, l in zip(texts, labels) if l == c], limit=30,
+                                        keep_emojis=True, method="python") for c in classes},
+        "processes": lambda: {c: top_words([t for t, l in zip(texts, labels) if l == c], limit=30,
+                                           keep_emojis=True, method="processes", workers=workers) for c in classes},
+        "by_class": lambda: top_words_by_class(texts, labels, limit=30, keep_emojis=True, vectorized=False),
+        "by_class_vectorized": lambda: top_words_by_class(texts, labels, limit=30, keep_emojis=True, vectorized=True),
+    }
+    for name, fn in engines.items():
+        got, t = _timed(fn)
+        if got != expected:
+            raise AssertionError(f"top_words engine {name!r} disagrees with the legacy output")
+        out[f"{name}_s"] = round(t, 3)
+    return out
+
+
+def bench_startup(repeats: int = 3):
+    """Cold-start cost in fresh interpreters: bare import vs import + warm_up()."""
+    snippets = {
+        "import_s": "import sentiment_analyzer",
+        "import_warm_s": "import sentiment_analyzer; sentiment_analyzer.warm_up(translation=False)",
+        "import_warm_translate_s": "import sentiment_analyzer; sentiment_analyzer.warm_up()",
+    }
+    out = {}
+    for name, code in snippets.items():
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        out[name] = round(best, 3)
+    return out
+
+
+# ---------------------------- Stage suite ----------------------------
+def _generated_items(n: int, seed: int):
+    return generate_corpus(n, seed=seed, hashtag="generated").to_dict("records")
+
+
+def corpora(sizes, seed: int):
+    """Named, seeded corpora: a hashtag run, a paste, then generated corpora of each size."""
+    random.seed(seed)
+    posts, comments = data_collector.collect_hashtag_data("food", 100, include_comments=True)
+    yield "hashtag_food_100", posts + comments
+    random.seed(seed)
+    pasted = [_random_comment_text() for _ in range(1000)]
+    yield "pasted_1000", data_collector.build_from_pasted_comments(pasted)[1]
+    for n in sizes:
+        yield f"generated_{n}", _generated_items(n, seed)
+
+
+def _stage(results, name, n, fn, *args, repeats: int = 1, **kwargs):
+    times = []
+    while True:
+        out, seconds = _timed(fn, *args, **kwargs)
+        times.append(seconds)
+        if len(times) >= repeats or sum(times) >= STAGE_BUDGET_S:
+            break
+    best = min(times)
+    results[name] = {
+        "items": n,
+        "seconds": round(best, 4),
+        "median_s": round(statistics.median(times), 4),
+        "runs": len(times),
+        "items_per_s": round(n / best, 1) if best else None,
+    }
+    return out
+
+
+def run_stages(items, max_scored: int = DEFAULT_MAX_SCORED, repeats: int = DEFAULT_REPEATS) -> dict:
+    """Time each stage on its own. Returns {stage: {items, seconds, median_s, runs, items_per_s}};
+    ``seconds`` and ``items_per_s`` are from the fastest run."""
+    res = {}
+    n = len(items)
+    texts = [it["text"] for it in items]
+    cleaned = _stage(res, "clean_text", n, lambda: [clean_text(t) for t in texts], repeats=repeats)
+    get_langid()  # model build is a one-off, not per-item cost
+    _stage(res, "detect_language", n, detect_languages, cleaned, repeats=repeats)
+
+    scored = cleaned[:max_scored]
+    vader, blob = get_vader(), get_textblob()
+    _stage(res, "vader", len(scored), lambda: [vader.polarity_scores(t)["compound"] for t in scored], repeats=repeats)
+    _stage(res, "textblob", len(scored), lambda: [blob(t).sentiment.polarity for t in scored], repeats=repeats)
+    lexicon = get_lexicon()
+    _stage(res, "lexicon", n, lexicon.score_batch, cleaned, repeats=repeats)
+    _stage(res, "batch_analyze", len(scored), batch_analyze, items[:max_scored], workers=1, repeats=repeats)
+
+    distinct = list(dict.fromkeys(cleaned))
+    _stage(res, "near_duplicates", len(distinct), near_duplicate_groups, distinct, key_words=lexicon.polar_tokens,
+           repeats=repeats)
+    analyzed = _stage(res, "analyze_frame", n, analyze_frame, texts, workers=1, repeats=repeats)
+    frame = _stage(res, "dataframe", n, lambda: pd.concat([pd.DataFrame(items), analyzed], axis=1), repeats=repeats)
+    _stage(res, "refine", n, ensemble_scores, frame["vader_compound"].to_numpy(),
+           frame["textblob_polarity"].to_numpy(), repeats=repeats)
+    _stage(res, "top_words", n, top_words_by_class, frame["clean_text"], frame["sentiment"],
+           limit=30, keep_emojis=True, repeats=repeats)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+    _stage(res, "build_summary_json", n, build_summary_json, frame, "bench", repeats=repeats)
+    trend = _stage(res, "trend_buckets", n, bucket_trend, frame, repeats=repeats)
+    _stage(res, "trend_downsample", len(trend), lambda: downsample(trend.assign(smoothed=smooth(trend, 5)), "smoothed"),
+           repeats=repeats)
+    return res
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> list:
+    """Stages whose items/s fell more than ``tolerance`` (fraction) below the baseline
+    and whose run got at least ``min_delta_ms`` slower."""
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        cur = current["results"].get(key)
+        if not cur or not base.get("items_per_s") or not cur.get("items_per_s"):
+            continue
+        ratio = cur["items_per_s"] / base["items_per_s"]
+        slower_ms = (cur["seconds"] - base["seconds"]) * 1e3
+        if ratio < 1 - tolerance and slower_ms >= min_delta_ms:
+            regressions.append({"stage": key, "baseline_items_per_s": base["items_per_s"],
+                                "items_per_s": cur["items_per_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def run_suite(args) -> int:
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    started = time.perf_counter()
+    random.seed(args.seed)
+    collect = {}
+    posts, comments = _stage(collect, "collection", 1, data_collector.collect_hashtag_data, "food", 1000,
+                             include_comments=True)
+    n = len(posts) + len(comments)
+    collect["collection"].update(items=n, items_per_s=round(n / collect["collection"]["seconds"], 1))
+
+    results = {"hashtag_food_1000/collection": collect["collection"]}
+    for name, items in corpora(sizes, args.seed):
+        print(f"[{name}] {len(items)} items", flush=True)
+        for stage, row in run_stages(items, args.max_scored, args.repeats).items():
+            results[f"{name}/{stage}"] = row
+            print(f"  {stage:>20}: {row['items_per_s']} items/s ({row['seconds']}s)", flush=True)
+
+    report = {
+        "meta": {
+            "generated_at": datetime.now().isoformat(),
+            "seed": args.seed,
+            "sizes": sizes,
+            "max_scored": args.max_scored,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total_s": round(time.perf_counter() - started, 2),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding="utf-8") as fh:
+                baseline = json.load(fh)
+        except FileNotFoundError:
+            baseline = None
+        if baseline is not None and not args.save_baseline:
+            report["regressions"] = compare(report, baseline, args.tolerance, args.min_delta_ms)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    for r in report.get("regressions", []):
+        print(f"REGRESSION {r['stage']}: {r['items_per_s']} vs {r['baseline_items_per_s']} items/s (x{r['ratio']})")
+    return 1 if report.get("regressions") else 0
+
+
+def run_reports(args) -> int:
+    for key, value in bench_startup().items():
+        print(f"{key:>28}: {value}")
+    items = _items(args.posts, args.seed)
+    for key, value in bench_batch_paths(items).items():
+        print(f"{key:>28}: {value}")
+    for key, value in bench_parallel(items, resolve_workers(args.workers)).items():
+        print(f"{key:>28}: {value}")
+    for row in bench_cascade(items):
+        print("  cascade " + "  ".join(f"{k}={v}" for k, v in row.items()))
+    for key, value in bench_engines(items).items():
+        print(f"{'lexicon ' + key:>28}: {value}")
+    for key, value in bench_routing(items).items():
+        print(f"{'routing ' + key:>28}: {value}")
+    texts = [it["text"] for it in items]
+    labels = [r["sentiment"] for r in batch_analyze(items)]
+    for key, value in bench_top_words(texts, labels, resolve_workers(args.workers)).items():
+        print(f"{key:>28}: {value}")
+    return 0
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--seed", type=int, default=7)
+    common.add_argument("--translation", default="stub", help="translation backend (default: offline stub)")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command")
+
+    stages = sub.add_parser("stages", parents=[common], help="per-stage throughput with baseline comparison")
+    stages.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated generated corpus sizes")
+    stages.add_argument("--max-scored", type=int, default=DEFAULT_MAX_SCORED)
+    stages.add_argument("--output", default="bench_results.json")
+    stages.add_argument("--baseline", default=None)
+    stages.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    stages.add_argument("--tolerance", type=float, default=0.25, help="allowed items/s drop before flagging")
+    stages.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="runs per stage; the fastest counts")
+    stages.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this")
+
+    reports = sub.add_parser("reports", parents=[common], help="side-by-side comparisons")
+    reports.add_argument("--posts", type=int, default=200)
+    reports.add_argument("--workers", type=int, default=None, help="pool size (default: config.ANALYSIS_WORKERS)")
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("stages", "reports", "-h", "--help"):
+        argv.insert(0, "stages")
+    args = parser.parse_args(argv)
+
+    # Measure raw analysis cost: no cache warmth, no network
+    sentiment_analyzer._result_cache = None
+    config.TRANSLATION_BACKEND = args.translation
+    return run_suite(args) if args.command == "stages" else run_reports(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(text: str, version: str) -> str:
+    """Content address for a normalized text under a given analyzer version."""
+    return hashlib.sha1(f"{version}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Bounded in-process cache; least recently used entries are dropped first."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class TTLCache(LRUCache):
+    """LRUCache whose entries expire ``ttl`` seconds after they were stored."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600.0):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        if time.monotonic() >= expires:
+            self.discard(key)
+            self.hits -= 1
+            self.misses += 1
+            return default
+        return value
+
+    def put(self, key, value):
+        super().put(key, (value, time.monotonic() + self.ttl))
+
+
+class DiskCache:
+    """SQLite-backed key/value store that survives restarts.
+
+    Values must be JSON-serializable. When the stored payload grows past
+    ``max_bytes`` the least recently used rows are evicted down to 90% of it.
+    The payload size is tracked incrementally, and access times from hits are
+    buffered and written in one batch (at the latest before the next write).
+    """
+
+    # Buffered hit timestamps written per batch, and keys per IN (...) size lookup
+    ATIME_FLUSH = 256
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._size = 0
+        self._touched = {}
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, atime REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_atime ON entries(atime)")
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key, default=None):
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.ATIME_FLUSH:
+                self._flush_atimes(conn)
+            self.hits += 1
+            return json.loads(row[0])
+
+    def _flush_atimes(self, conn):
+        if not self._touched:
+            return
+        with conn:
+            conn.executemany("UPDATE entries SET atime = ? WHERE key = ?",
+                             [(t, k) for k, t in self._touched.items()])
+        self._touched.clear()
+
+    def _stored_sizes(self, conn, keys) -> int:
+        total = 0
+        for i in range(0, len(keys), self.LOOKUP_BATCH):
+            part = keys[i:i + self.LOOKUP_BATCH]
+            sql = f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({', '.join('?' * len(part))})"
+            total += conn.execute(sql, part).fetchone()[0]
+        return total
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, pairs):
+        now = time.time()
+        rows = {}
+        for key, value in pairs:
+            payload = json.dumps(value, ensure_ascii=False)
+            rows[key] = (key, payload, len(payload), now)  # the last value for a key wins
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            self._flush_atimes(conn)
+            with conn:
+                # Rows being replaced no longer count towards the payload size
+                replaced = self._stored_sizes(conn, list(rows))
+                conn.executemany("INSERT OR REPLACE INTO entries(key, value, size, atime) VALUES (?, ?, ?, ?)",
+                                 list(rows.values()))
+            self._size += sum(r[2] for r in rows.values()) - replaced
+            if self._size > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn):
+        target = int(self.max_bytes * 0.9)
+        removed = []
+        freed = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY atime"):
+            if self._size - freed <= target:
+                break
+            removed.append((key,))
+            freed += size
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", removed)
+        self.evictions += len(removed)
+        self._size -= freed
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries")
+            self._size = 0
+            self._touched.clear()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            self._connect()
+            return self._size
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class ResultCache:
+    """Two-tier cache: a memory LRU in front of an optional on-disk store."""
+
+    def __init__(self, maxsize: int = 10000, path: str | None = None, max_bytes: int = 64 * 1024 * 1024):
+        self.memory = LRUCache(maxsize)
+        self.disk = DiskCache(path, max_bytes) if path else None
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return None
+        try:
+            value = self.disk.get(key)
+        except sqlite3.Error:
+            return None
+        if value is not None:
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, pairs):
+        pairs = list(pairs)
+        for key, value in pairs:
+            self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put_many(pairs)
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        out = {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory.hits,
+            "memory_misses": self.memory.misses,
+        }
+        if self.disk is not None:
+            out.update({
+                "disk_hits": self.disk.hits,
+                "disk_misses": self.disk.misses,
+                "disk_evictions": self.disk.evictions,
+                "disk_bytes": self.disk.size_bytes(),
+            })
+        return out
@@ -0,0 +1,269 @@
+"""Headless bulk analysis of JSONL/CSV files.
+
+Usage:
+  python cli.py INPUT --output results.parquet [--workers N] [--chunk-size 5000]
+                [--text-field text] [--mode full|cascade] [--engine ensemble|lexicon]
+                [--translation none]
+                [--summary summary.json] [--label NAME]
+
+INPUT is a .jsonl/.ndjson or .csv file ("-" reads JSONL from stdin). Rows are
+read, analyzed and written one chunk at a time, so memory stays bounded by
+--chunk-size whatever the input size. The output format follows the extension:
+.parquet, .jsonl/.ndjson, or .db/.sqlite (the SQLite results store). A summary
+(utils.build_summary_json) and a throughput report are printed at the end.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+import sentiment_analyzer
+from aggregates import SentimentAggregate
+from config import config
+from data_collector import DEFAULT_BATCH_SIZE, iter_batches
+from ingest import detect_format, iter_records
+from utils import build_summary_json
+
+OUTPUT_FORMATS = {".parquet": "parquet", ".jsonl": "jsonl", ".ndjson": "jsonl", ".db": "sqlite", ".sqlite": "sqlite"}
+
+
+def _format_of(path: str, given: str | None) -> str:
+    if given:
+        return given
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in OUTPUT_FORMATS:
+        raise SystemExit(f"can't tell the format of {path!r}; pass --output-format")
+    return OUTPUT_FORMATS[ext]
+
+
+def _with_text(chunks, text_field: str):
+    # The analyzer and the results table expect the text under "text"; the source column stays as it is
+    for chunk in chunks:
+        for row in chunk:
+            if text_field != "text":
+                if "text" in row:
+                    raise SystemExit(f'input already has a "text" field; --text-field {text_field} would overwrite it')
+                row["text"] = row.get(text_field)
+            if not isinstance(row.get("text"), str):
+                row["text"] = "" if row.get("text") is None else str(row["text"])
+        yield chunk
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, df):
+        text = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        self._f.write(text if not text or text.endswith("\n") else text + "\n")
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetWriter:
+    """Appends one row group per chunk.
+
+    The schema comes from the first chunk. A later chunk bringing new columns
+    widens it: the row groups written so far are copied into a new file with
+    those columns null. A column whose type changes can't be reconciled and
+    stops the run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def _frame(self, df):
+        import pandas as pd
+        out = {}
+        for col in df.columns:
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                out[col] = s.astype(object)
+            elif s.dtype == object and col not in ("clean_text", "translated_text"):
+                # Free-form input fields can mix types across rows; store them as text
+                out[col] = s.where(s.isna(), s.astype(str))
+        return df.assign(**out) if out else df
+
+    @staticmethod
+    def _fields(df):
+        import pyarrow as pa
+        # Columns that are all null in the chunk would otherwise be typed null forever
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        return [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema]
+
+    def _widen(self, fields):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        wider = pa.schema(list(self._schema) + fields)
+        self._writer.close()
+        narrow = self.path + ".narrow"
+        os.replace(self.path, narrow)
+        try:
+            self._writer = pq.ParquetWriter(self.path, wider)
+            src = pq.ParquetFile(narrow)
+            for i in range(src.num_row_groups):
+                table = src.read_row_group(i)
+                for f in fields:
+                    table = table.append_column(f, pa.nulls(len(table), f.type))
+                self._writer.write_table(table)
+            src.close()
+        finally:
+            os.remove(narrow)
+        self._schema = wider
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        df = self._frame(df)
+        if self._writer is None:
+            self._schema = pa.schema(self._fields(df))
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        else:
+            new = [c for c in df.columns if c not in self._schema.names]
+            if new:
+                self._widen(self._fields(df[new]))
+        df = df.reindex(columns=self._schema.names)
+        try:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        except pa.ArrowException as exc:
+            raise SystemExit(f"{self.path}: a column changed type between chunks ({exc}); "
+                             "write JSONL or clean the input") from exc
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class SqliteWriter:
+    def __init__(self, path: str, run_id: str):
+        from database import DatabaseManager
+        self._db = DatabaseManager(path)
+        self.run_id = run_id
+
+    def write(self, df):
+        self._db.insert_results(df, run_id=self.run_id)
+
+    def close(self):
+        self._db.close()
+
+
+def make_writer(path: str, fmt: str, run_id: str):
+    if fmt == "parquet":
+        return ParquetWriter(path)
+    if fmt == "jsonl":
+        return JsonlWriter(path)
+    return SqliteWriter(path, run_id)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run(args) -> dict:
+    import pandas as pd
+
+    in_fmt = args.input_format or ("jsonl" if args.input == "-" else detect_format(args.input))
+    if in_fmt not in ("jsonl", "csv"):
+        raise SystemExit(f"can't tell the format of {args.input!r}; pass --input-format")
+    out_fmt = _format_of(args.output, args.output_format)
+    run_id = args.run_id or uuid.uuid4().hex[:12]
+    workers = sentiment_analyzer.resolve_workers(args.workers)
+    stats = {"skipped": 0}
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    writer = make_writer(args.output, out_fmt, run_id)
+    agg = SentimentAggregate(track_words=False)
+    chunks = 0
+    start = time.perf_counter()
+    try:
+        batches = _with_text(iter_batches(iter_records(src, in_fmt, stats), args.chunk_size), args.text_field)
+        for part in sentiment_analyzer.iter_analyze_frame(batches, workers=workers):
+            if "timestamp" in part:
+                part["timestamp"] = pd.to_datetime(part["timestamp"], errors="coerce")
+            writer.write(part)
+            agg.update(part)
+            chunks += 1
+            if not args.quiet:
+                elapsed = time.perf_counter() - start
+                print(f"\r{agg.total} rows, {agg.total / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+        if src is not sys.stdin:
+            src.close()
+        sentiment_analyzer.shutdown_pool()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    summary = build_summary_json(agg, args.label or os.path.basename(args.input))
+    summary["run_id"] = run_id
+    summary["throughput"] = {
+        "rows": agg.total,
+        "skipped_rows": stats["skipped"],
+        "chunks": chunks,
+        "chunk_size": args.chunk_size,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(agg.total / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output": args.output,
+        "output_format": out_fmt,
+    }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help='JSONL or CSV file, or "-" for JSONL on stdin')
+    parser.add_argument("--output", "-o", required=True, help="results file (.parquet, .jsonl, .db/.sqlite)")
+    parser.add_argument("--input-format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--output-format", choices=["parquet", "jsonl", "sqlite"], default=None)
+    parser.add_argument("--text-field", default="text", help="input field holding the text to analyze")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: config.ANALYSIS_WORKERS)")
+    parser.add_argument("--mode", choices=["full", "cascade"], default=None, help="default: config.ANALYSIS_MODE")
+    parser.add_argument("--engine", choices=["ensemble", "lexicon"], default=None,
+                        help="default: config.ANALYSIS_ENGINE")
+    parser.add_argument("--translation", default=None, help="translation backend (default: config)")
+    parser.add_argument("--no-cache", action="store_true", help="skip the persistent result cache")
+    parser.add_argument("--label", default=None, help="summary label (default: input file name)")
+    parser.add_argument("--run-id", default=None)
+    parser.add_argument("--summary", default=None, help="also write the summary JSON here")
+    parser.add_argument("--quiet", "-q", action="store_true")
+    args = parser.parse_args(argv)
+    args.chunk_size = max(1, args.chunk_size)
+
+    if args.mode:
+        config.ANALYSIS_MODE = args.mode
+    if args.engine:
+        config.ANALYSIS_ENGINE = args.engine
+    if args.translation:
+        config.TRANSLATION_BACKEND = args.translation
+    if args.no_cache:
+        sentiment_analyzer._result_cache = None
+
+    summary = run(args)
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    t = summary["throughput"]
+    print(f"{t['rows']} rows in {t['seconds']}s ({t['rows_per_s']} rows/s) across {t['workers']} worker(s)"
+          f" -> {t['output']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,94 @@ from dataclasses import dataclass
 @dataclass
 class Config:
     DATABASE_PATH: str = "instagram_sentiment.db"
+    PERSIST_RESULTS: bool = True
+    # Saved results of only the most recent runs are kept; older runs' rows are deleted at each new run
+    RESULTS_KEEP_RUNS: int = 50
+    # Analysis jobs: input manifest and per-chunk checkpoints, so an interrupted run resumes
+    JOBS_DIR: str = ".cache/jobs"
+    JOBS_KEEP: int = 20
+    # Saved dashboard sessions: memory budget before older ones spill to disk as Parquet
+    SESSION_MEMORY_BUDGET_MB: int = 256
+    SESSION_SPILL_DIR: str = ".cache/sessions"
+    # Finished runs keyed by an input fingerprint: in-memory LRU, then files on disk
+    RUN_CACHE_ENABLED: bool = True
+    RUN_CACHE_ENTRIES: int = 8
+    RUN_CACHE_DISK_ENTRIES: int = 64
+    RUN_CACHE_DIR: str = ".cache/runs"
+    # Seed for the sample collector; the same seed and inputs give the same items
+    DEFAULT_SEED: int = 42
+    # Most comments taken from a paste or upload (0 = no limit); uploads stream, so this bounds time, not memory
+    MAX_COMMENT_LINES: int = 500000
     MAX_POSTS_PER_HASHTAG: int = 100
     CONFIDENCE_THRESHOLD: float = 0.6
+    # VADER/TextBlob ensemble: weighted score inside +/- band is Neutral
+    ENSEMBLE_VADER_WEIGHT: float = 0.6
+    ENSEMBLE_TEXTBLOB_WEIGHT: float = 0.4
+    ENSEMBLE_NEUTRAL_BAND: float = 0.06
+    # "full" scores everything with VADER + TextBlob; "cascade" lets VADER decide
+    # alone when |compound| >= CASCADE_VADER_THRESHOLD (see benchmark.py for the tradeoff)
+    ANALYSIS_MODE: str = "full"
+    CASCADE_VADER_THRESHOLD: float = 0.5
+    # Scoring engine: "ensemble" (VADER + TextBlob above, translating non-English text) or "lexicon"
+    # (lexicon.py: VADER + Hinglish/Devanagari + emoji table scored in NumPy batches, no translation)
+    ANALYSIS_ENGINE: str = "ensemble"
+    # Language routing (langid.py): texts with >= LANGID_SCRIPT_THRESHOLD Devanagari letters are "hi"
+    # (translated), both scripts "mixed"; Latin text is "hinglish" at P >= LANGID_HINGLISH_THRESHOLD.
+    # With routing on, hinglish and mixed go to the lexicon scorer instead of VADER/translation.
+    LANGID_ROUTING: bool = True
+    LANGID_SCRIPT_THRESHOLD: float = 0.8
+    LANGID_HINGLISH_THRESHOLD: float = 0.5
+    # Per-stage timers/counters (profiling.profiler); near-zero cost when off
+    PROFILING_ENABLED: bool = False
+    # Near-duplicate collapsing before scoring (dedup.py): MinHash over word shingles, LSH with
+    # DEDUP_BANDS bands; texts whose estimated Jaccard similarity >= DEDUP_THRESHOLD and whose negations
+    # and sentiment words are identical share one score. Groups of DEDUP_WAVE_SIZE or more are flagged as possible bot waves in the dashboard.
+    DEDUP_ENABLED: bool = True
+    DEDUP_THRESHOLD: float = 0.7
+    DEDUP_NUM_PERM: int = 64
+    DEDUP_BANDS: int = 16
+    DEDUP_SHINGLE_SIZE: int = 1
+    DEDUP_WAVE_SIZE: int = 5
+    # Trend chart: bucket width is the finest giving at most TREND_MAX_BUCKETS buckets; LTTB draws TREND_POINTS
+    TREND_MAX_BUCKETS: int = 2000
+    TREND_POINTS: int = 500
     THEME: str = "dark"
     SUCCESS_COLOR: str = "#00CC96"
     WARNING_COLOR: str = "#FFA15A"
     ERROR_COLOR: str = "#EF553B"
+    # Result cache for analyze_text (memory LRU + on-disk store)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_SIZE: int = 50000
+    RESULT_CACHE_PATH: str = ".cache/sentiment_results.sqlite"
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Process pool for batch analysis: 0 = one worker per CPU core, 1 = single process
+    ANALYSIS_WORKERS: int = 0
+    # HTTP service (service.py): micro-batches close at MAX_BATCH items or MAX_WAIT_MS after the first;
+    # requests get 503 once MAX_QUEUE items are waiting
+    SERVICE_HOST: str = "127.0.0.1"
+    SERVICE_PORT: int = 8080
+    SERVICE_MAX_BATCH: int = 256
+    SERVICE_MAX_WAIT_MS: float = 10.0
+    SERVICE_MAX_QUEUE: int = 10000
+    SERVICE_MAX_REQUEST_ITEMS: int = 1000
+    # URL mode fetcher (fetcher.py). Off by default: captions come from the offline sample instead.
+    FETCH_ENABLED: bool = False
+    FETCH_URL_TEMPLATE: str = "https://www.instagram.com/p/{shortcode}/"
+    FETCH_CONCURRENCY: int = 32
+    FETCH_PER_HOST_RATE: float = 10.0  # requests/second per host; 0 = unlimited
+    FETCH_PER_HOST_BURST: int = 20
+    FETCH_TIMEOUT: float = 10.0
+    FETCH_RETRIES: int = 3
+    FETCH_BACKOFF: float = 0.5
+    FETCH_CACHE_SIZE: int = 5000
+    FETCH_CACHE_TTL: float = 3600.0
+    # Translation stage: backend is "googletrans", "stub" (offline) or "none"
+    TRANSLATION_BACKEND: str = "googletrans"
+    TRANSLATION_BATCH_SIZE: int = 25
+    TRANSLATION_CONCURRENCY: int = 4
+    TRANSLATION_TIMEOUT: float = 8.0
+    TRANSLATION_RETRIES: int = 2
+    TRANSLATION_CACHE_SIZE: int = 20000
+    TRANSLATION_CACHE_PATH: str = ".cache/translations.sqlite"
 
 config = Config()
@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 import random
 import re
-from typing import List, Tuple
+import zlib
+from typing import Iterable, Iterator, List, Tuple
+
+from config import config
 
 # Accepts www., m., or no subdomain; path can be /p/, /reel/, /tv/, followed by a shortcode (>=5 chars), with optional extra path/query
 SHORTCODE_RE = re.compile(
@@ -13,6 +16,14 @@ SHORTCODE_RE = re.compile(
 MIN_COMMENTS_PER_POST = 40
 MAX_COMMENTS_PER_POST = 120   # raise this to get more items per post
 
+# generate_corpus timestamps count back from here unless given ``now``, so a seed fixes the whole corpus
+CORPUS_EPOCH = datetime(2024, 1, 1)
+
+# Items per batch yielded by the streaming (iter_*) collectors
+DEFAULT_BATCH_SIZE = 2000
+# Shortcodes fetched together by iter_from_urls
+FETCH_WINDOW = 200
+
 # Varied comment generator (Hinglish + emojis + intensifiers)
 POS_PHRASES = ["love this", "amazing", "awesome", "so good", "fantastic", "beautiful", "lit", "fire", "mast", "bahut badhiya"]
 NEG_PHRASES = ["not good", "terrible", "bad", "disappointing", "overrated", "waste", "boring", "meh", "pasand nahi aaya", "bakwaas"]
@@ -25,26 +36,50 @@ EMOJIS_NEU = ["🙂", "🤔", "😐", "🫡"]
 HINGLISH_FILLERS = ["yrr", "btw", "lol", "fr", "tbh", "ik", "bro", "pls", "na", "bc", "ngl"]
 INTENSIFIERS = ["really", "truly", "seriously", "kinda", "pretty", "very", "bahut", "zyada"]
 
-def _rand(seq): return random.choice(seq)
-def _maybe(seq, p=0.5): return _rand(seq) if random.random() < p else ""
+# Romanized-Hindi phrases within the pools above (used by generate_corpus's hinglish_ratio)
+HINGLISH_PHRASES = {"mast", "bahut badhiya", "pasand nahi aaya", "bakwaas", "theek hai"}
+
+# rng is the random module itself by default, or a random.Random(seed) for reproducible runs
+def _rng_for(seed): return random.Random(seed) if seed is not None else random
+def _rand(seq, rng=random): return rng.choice(seq)
+def _maybe(seq, p=0.5, rng=random): return _rand(seq, rng) if rng.random() < p else ""
 
-def _make_comment(sent: str) -> str:
+def _make_comment(sent: str, rng=random) -> str:
     parts = []
-    if random.random() < 0.5: parts.append(_maybe(HINGLISH_FILLERS, 0.6))
-    if random.random() < 0.5: parts.append(_maybe(INTENSIFIERS, 0.7))
+    if rng.random() < 0.5: parts.append(_maybe(HINGLISH_FILLERS, 0.6, rng))
+    if rng.random() < 0.5: parts.append(_maybe(INTENSIFIERS, 0.7, rng))
     parts.append(sent)
-    if random.random() < 0.6:
-        if sent in POS_PHRASES: parts.append(_maybe(EMOJIS_POS, 0.9))
-        elif sent in NEG_PHRASES: parts.append(_maybe(EMOJIS_NEG, 0.9))
-        else: parts.append(_maybe(EMOJIS_NEU, 0.7))
+    if rng.random() < 0.6:
+        if sent in POS_PHRASES: parts.append(_maybe(EMOJIS_POS, 0.9, rng))
+        elif sent in NEG_PHRASES: parts.append(_maybe(EMOJIS_NEG, 0.9, rng))
+        else: parts.append(_maybe(EMOJIS_NEU, 0.7, rng))
     return " ".join([x for x in parts if x]).strip()
 
-def _random_comment_text() -> str:
-    r = random.random()
-    if r < 0.4: base = _rand(POS_PHRASES)
-    elif r < 0.7: base = _rand(NEU_PHRASES)
-    else: base = _rand(NEG_PHRASES)
-    return _make_comment(base)
+def _random_comment_text(rng=random) -> str:
+    r = rng.random()
+    if r < 0.4: base = _rand(POS_PHRASES, rng)
+    elif r < 0.7: base = _rand(NEU_PHRASES, rng)
+    else: base = _rand(NEG_PHRASES, rng)
+    return _make_comment(base, rng)
+
+def _parse_time(value, default: datetime) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return default
+
+def iter_batches(items: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list]:
+    """Group any item stream into lists of at most batch_size items."""
+    batch = []
+    for it in items:
+        batch.append(it)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 class InstagramDataCollector:
     def __init__(self):
@@ -141,55 +176,78 @@ class InstagramDataCollector:
     def get_available_hashtags(self):
         return list(self.sample.keys())
 
-    def _fake_comments(self, post_id: str, hashtag: str, count: int):
-        now = datetime.now()
+    def _fake_comments(self, post_id: str, hashtag: str, count: int, rng=random, now: datetime | None = None):
+        now = now or datetime.now()
         out = []
         for i in range(count):
             out.append({
                 "post_id": post_id,
                 "comment_id": f"{post_id}_c{i+1:04d}",
                 "hashtag": hashtag,
-                "text": _random_comment_text(),
-                "author_username": f"cuser_{random.randint(100,999)}",
-                "likes_count": random.randint(0, 60),
-                "timestamp": now - timedelta(minutes=random.randint(1, 60*24)),
+                "text": _random_comment_text(rng),
+                "author_username": f"cuser_{rng.randint(100,999)}",
+                "likes_count": rng.randint(0, 60),
+                "timestamp": now - timedelta(minutes=rng.randint(1, 60*24)),
                 "type": "comment",
             })
         return out
 
-    def collect_hashtag_data(self, hashtag: str, max_posts: int = 50, include_comments: bool = True) -> Tuple[list, list]:
-        """Return up to max_posts captions from the hashtag sample and lots of comments per caption."""
+    def _expand_sample(self, hashtag: str, max_posts: int) -> list:
         texts = self.sample.get(hashtag.lower(), [])
-        posts = []
-        now = datetime.now()
-
         # Repeat/loop the sample to reach requested max_posts if needed
         if not texts:
             texts = ["No sample text available."]
         expanded = []
         while len(expanded) < max_posts:
             expanded.extend(texts)
-        expanded = expanded[:max_posts]
+        return expanded[:max_posts]
 
-        for i, text in enumerate(expanded):
-            pid = f"{hashtag}_{i+1:04d}"
-            posts.append({
-                "post_id": pid,
-                "hashtag": hashtag,
-                "text": text,
-                "author_username": f"user_{random.randint(1000,9999)}",
-                "likes_count": random.randint(0, 1000),
-                "timestamp": now - timedelta(hours=random.randint(1,72)),
-                "type": "caption",
-            })
+    def _hashtag_post(self, hashtag: str, i: int, text: str, now: datetime, rng=random) -> dict:
+        return {
+            "post_id": f"{hashtag}_{i+1:04d}",
+            "hashtag": hashtag,
+            "text": text,
+            "author_username": f"user_{rng.randint(1000,9999)}",
+            "likes_count": rng.randint(0, 1000),
+            "timestamp": now - timedelta(hours=rng.randint(1,72)),
+            "type": "caption",
+        }
 
-        comments = []
-        if include_comments:
-            for p in posts:
-                n = random.randint(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST)
-                comments.extend(self._fake_comments(p["post_id"], hashtag, count=n))
+    def collect_hashtag_data(self, hashtag: str, max_posts: int = 50, include_comments: bool = True,
+                             seed: int | None = None) -> Tuple[list, list]:
+        """Return up to max_posts captions from the hashtag sample and lots of comments per caption."""
+        rng = _rng_for(seed)
+        now = datetime.now()
+        posts, comments = [], []
+        # Same draw order as iter_hashtag_data, so a seed gives the same items either way
+        for i, text in enumerate(self._expand_sample(hashtag, max_posts)):
+            post = self._hashtag_post(hashtag, i, text, now, rng)
+            posts.append(post)
+            if include_comments:
+                n = rng.randint(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST)
+                comments.extend(self._fake_comments(post["post_id"], hashtag, count=n, rng=rng, now=now))
         return posts, comments
 
+    def iter_hashtag_data(self, hashtag: str, max_posts: int = 50, include_posts: bool = True,
+                          include_comments: bool = True, batch_size: int = DEFAULT_BATCH_SIZE,
+                          seed: int | None = None, now: datetime | None = None) -> Iterator[list]:
+        """Streaming collect_hashtag_data: yield batches of items, one post (and its comments) at a time.
+
+        Timestamps count back from ``now`` (default: the current time); pass the same seed and ``now``
+        to get the same batches again.
+        """
+        def items():
+            rng = _rng_for(seed)
+            start = now or datetime.now()
+            for i, text in enumerate(self._expand_sample(hashtag, max_posts)):
+                post = self._hashtag_post(hashtag, i, text, start, rng)
+                if include_posts:
+                    yield post
+                if include_comments:
+                    n = rng.randint(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST)
+                    yield from self._fake_comments(post["post_id"], hashtag, count=n, rng=rng, now=start)
+        return iter_batches(items(), batch_size)
+
     def extract_shortcode(self, url: str) -> str | None:
         u = url.strip()
         # Unwrap l.instagram.com redirect links
@@ -214,46 +272,241 @@ class InstagramDataCollector:
             "Mixed feelings about this update, क्या सोचते हो?",
             "Sunset view never disappoints 🌅",
         ]
-        return caps[abs(hash(shortcode)) % len(caps)]
+        # crc32, not hash(): str hashes are salted per process, which broke seeded reruns
+        return caps[zlib.crc32(shortcode.encode()) % len(caps)]
 
-    def collect_from_urls(self, urls: List[str], include_comments: bool = True) -> Tuple[list, list]:
-        posts, comments = [], []
-        now = datetime.now()
+    def _url_codes(self, urls: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """(url, shortcode) for each URL with a new shortcode; repeats of a post are dropped."""
+        seen = set()
         for u in urls:
             code = self.extract_shortcode(u)
-            if not code:
-                continue
-            caption = self._fake_caption_for_shortcode(code)  # Replace with real fetch if you add auth/scraping
-            post = {
-                "post_id": f"url_{code}",
+            if code and code not in seen:
+                seen.add(code)
+                yield u, code
+
+    def _fetch_posts(self, codes: List[str], fetcher=None) -> dict:
+        """Fetched {"caption", "comments"} by shortcode; empty unless a fetcher is given or FETCH_ENABLED."""
+        if fetcher is None:
+            if not config.FETCH_ENABLED:
+                return {}
+            from fetcher import get_fetcher
+            fetcher = get_fetcher()
+        return {c: p for c, p in fetcher.fetch_many(codes).items() if p is not None}
+
+    def _url_post(self, url: str, code: str, now: datetime, rng=random, fetched: dict | None = None) -> dict:
+        # Offline sample caption unless the post was fetched
+        caption = (fetched or {}).get("caption") or self._fake_caption_for_shortcode(code)
+        return {
+            "post_id": f"url_{code}",
+            "hashtag": "url_mode",
+            "text": caption,
+            "author_username": f"user_{rng.randint(1000,9999)}",
+            "likes_count": rng.randint(0, 5000),
+            "timestamp": now - timedelta(hours=rng.randint(1, 72)),
+            "type": "caption",
+            "source_url": url.strip(),
+        }
+
+    def _url_comments(self, post: dict, fetched: dict | None, now: datetime, rng=random) -> list:
+        if not fetched or not fetched.get("comments"):
+            n = rng.randint(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST)
+            return self._fake_comments(post["post_id"], "url_mode", count=n, rng=rng, now=now)
+        out = []
+        for i, c in enumerate(fetched["comments"]):
+            out.append({
+                "post_id": post["post_id"],
+                "comment_id": f"{post['post_id']}_c{i+1:04d}",
                 "hashtag": "url_mode",
-                "text": caption,
-                "author_username": f"user_{random.randint(1000,9999)}",
-                "likes_count": random.randint(0, 5000),
-                "timestamp": now - timedelta(hours=random.randint(1, 72)),
-                "type": "caption",
-                "source_url": u.strip(),
-            }
+                "text": c.get("text") or "",
+                "author_username": c.get("author_username") or "",
+                "likes_count": int(c.get("likes_count") or 0),
+                "timestamp": _parse_time(c.get("timestamp"), now),
+                "type": "comment",
+            })
+        return out
+
+    def collect_from_urls(self, urls: List[str], include_comments: bool = True,
+                          seed: int | None = None, fetcher=None) -> Tuple[list, list]:
+        rng = _rng_for(seed)
+        posts, comments = [], []
+        now = datetime.now()
+        pairs = list(self._url_codes(urls))
+        fetched = self._fetch_posts([code for _, code in pairs], fetcher)
+        for u, code in pairs:
+            post = self._url_post(u, code, now, rng, fetched.get(code))
             posts.append(post)
             if include_comments:
-                n = random.randint(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST)
-                comments.extend(self._fake_comments(post["post_id"], "url_mode", count=n))
+                comments.extend(self._url_comments(post, fetched.get(code), now, rng))
         return posts, comments
 
-    def build_from_pasted_comments(self, lines: List[str]) -> Tuple[list, list]:
+    def iter_from_urls(self, urls: Iterable[str], include_posts: bool = True, include_comments: bool = True,
+                       batch_size: int = DEFAULT_BATCH_SIZE, seed: int | None = None,
+                       fetcher=None, now: datetime | None = None) -> Iterator[list]:
+        """Streaming collect_from_urls: yield batches of items, one post (and its comments) at a time.
+
+        Posts are fetched a window of FETCH_WINDOW shortcodes at a time, concurrently within the window.
+        Timestamps count back from ``now`` (default: the current time), as in iter_hashtag_data.
+        """
+        def items():
+            rng = _rng_for(seed)
+            start = now or datetime.now()
+            for window in iter_batches(self._url_codes(urls), FETCH_WINDOW):
+                fetched = self._fetch_posts([code for _, code in window], fetcher)
+                for u, code in window:
+                    post = self._url_post(u, code, start, rng, fetched.get(code))
+                    if include_posts:
+                        yield post
+                    if include_comments:
+                        yield from self._url_comments(post, fetched.get(code), start, rng)
+        return iter_batches(items(), batch_size)
+
+    def _pasted_comments(self, lines: Iterable[str], rng) -> Iterator[dict]:
         now = datetime.now()
-        comments = []
-        for i, t in enumerate([ln for ln in lines if ln.strip()]):
-            comments.append({
+        for i, t in enumerate(ln for ln in lines if ln.strip()):
+            yield {
                 "post_id": f"pasted_{i//200}",  # group more densely to scale
                 "comment_id": f"p_{i+1:05d}",
                 "hashtag": "pasted",
                 "text": t.strip(),
                 "author_username": f"u_{1000+i}",
-                "likes_count": random.randint(0, 30),
-                "timestamp": now - timedelta(minutes=random.randint(1, 60*24)),
+                "likes_count": rng.randint(0, 30),
+                "timestamp": now - timedelta(minutes=rng.randint(1, 60*24)),
                 "type": "comment",
-            })
-        return [], comments
+            }
+
+    def build_from_pasted_comments(self, lines: List[str], seed: int | None = None) -> Tuple[list, list]:
+        return [], list(self._pasted_comments(lines, _rng_for(seed)))
+
+    def iter_pasted_comments(self, lines: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                             seed: int | None = None) -> Iterator[list]:
+        """Streaming build_from_pasted_comments: lines can be any iterable, e.g. an open file."""
+        def items():
+            yield from self._pasted_comments(lines, _rng_for(seed))
+        return iter_batches(items(), batch_size)
+
+def _phrase_table(hinglish_ratio):
+    """Flat phrase table plus per-(sentiment, phrase) draw probabilities, order pos/neu/neg."""
+    phrases, probs = [], []
+    for pool in (POS_PHRASES, NEU_PHRASES, NEG_PHRASES):
+        if hinglish_ratio is None:
+            w = [1.0] * len(pool)
+        else:
+            hing = [p in HINGLISH_PHRASES for p in pool]
+            nh = sum(hing)
+            w = [(hinglish_ratio / nh if h else (1 - hinglish_ratio) / (len(pool) - nh)) for h in hing]
+        total = sum(w)
+        probs.append([x / total for x in w])
+        phrases.extend(pool)
+    return phrases, probs
+
+def generate_corpus(n_comments: int, seed: int | None = None, hashtag: str = "synthetic",
+                    sentiment_mix=(0.4, 0.3, 0.3), hinglish_ratio: float | None = None,
+                    include_posts: bool = False, now: datetime | None = None, out: str | None = None):
+    """
+    Bulk, reproducible version of _fake_comments for load tests.
+    Draws phrases, fillers, intensifiers, emojis, likes and timestamps as whole NumPy
+    arrays and returns a DataFrame with the same columns as today's comments (plus
+    caption rows when include_posts). sentiment_mix is the (positive, neutral,
+    negative) share; hinglish_ratio, if given, is the share of romanized-Hindi phrases.
+    Timestamps count back from ``now`` (default CORPUS_EPOCH), so the same seed
+    gives the same frame. With out ending in .parquet or .jsonl the frame is
+    also written there.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    now = now or CORPUS_EPOCH
+    n = int(n_comments)
+
+    # Each comment follows _make_comment: [filler] [intensifier] phrase [emoji]
+    mix = np.asarray(sentiment_mix, dtype=float)
+    sent = rng.choice(3, size=n, p=mix / mix.sum())
+    phrases, probs = _phrase_table(hinglish_ratio)
+    offsets = np.array([0, len(POS_PHRASES), len(POS_PHRASES) + len(NEU_PHRASES)])
+    phrase = np.empty(n, dtype=np.int64)
+    for k in range(3):
+        idx = np.flatnonzero(sent == k)
+        phrase[idx] = offsets[k] + rng.choice(len(probs[k]), size=len(idx), p=probs[k])
+
+    fillers = [""] + HINGLISH_FILLERS
+    intens = [""] + INTENSIFIERS
+    emoji_pools = (EMOJIS_POS, EMOJIS_NEU, EMOJIS_NEG)
+    emojis = [""] + EMOJIS_POS + EMOJIS_NEU + EMOJIS_NEG
+    filler = np.where(rng.random(n) < 0.5 * 0.6, rng.integers(1, len(fillers), n), 0)
+    inten = np.where(rng.random(n) < 0.5 * 0.7, rng.integers(1, len(intens), n), 0)
+    emoji_p = np.where(sent == 1, 0.6 * 0.7, 0.6 * 0.9)
+    emoji_base = np.array([1, 1 + len(EMOJIS_POS), 1 + len(EMOJIS_POS) + len(EMOJIS_NEU)])[sent]
+    emoji_len = np.array([len(p) for p in emoji_pools])[sent]
+    emoji = np.where(rng.random(n) < emoji_p, emoji_base + (rng.random(n) * emoji_len).astype(np.int64), 0)
+
+    # Only a few thousand distinct strings exist: build each once, then gather
+    code = ((filler * len(intens) + inten) * len(phrases) + phrase) * len(emojis) + emoji
+    uniq, inverse = np.unique(code, return_inverse=True)
+    def compose(c):
+        c, e = divmod(int(c), len(emojis))
+        c, p = divmod(c, len(phrases))
+        f, i = divmod(c, len(intens))
+        return " ".join(x for x in (fillers[f], intens[i], phrases[p], emojis[e]) if x)
+    texts = np.array([compose(c) for c in uniq], dtype=object)[inverse]
+
+    # Group comments into posts of MIN..MAX comments, like collect_hashtag_data
+    sizes = rng.integers(MIN_COMMENTS_PER_POST, MAX_COMMENTS_PER_POST + 1, size=n // MIN_COMMENTS_PER_POST + 1)
+    sizes = sizes[: np.searchsorted(np.cumsum(sizes), n) + 1]
+    post = np.repeat(np.arange(len(sizes)), sizes)[:n]
+    within = np.arange(n) - np.repeat(np.cumsum(sizes) - sizes, sizes)[:n] + 1
+    post_ids = pd.Series(np.array([f"{hashtag}_{i+1:04d}" for i in range(len(sizes))], dtype=object)[post])
+    users = np.array([f"cuser_{i}" for i in range(100, 1000)], dtype=object)
+
+    df = pd.DataFrame({
+        "post_id": post_ids,
+        "comment_id": post_ids + "_c" + pd.Series(within).astype(str).str.zfill(4),
+        "hashtag": hashtag,
+        "text": texts,
+        "author_username": users[rng.integers(0, len(users), n)],
+        "likes_count": rng.integers(0, 61, n),
+        "timestamp": pd.Timestamp(now) - pd.to_timedelta(rng.integers(1, 60*24 + 1, n), unit="m"),
+        "type": "comment",
+    })
+
+    if include_posts:
+        captions = data_collector._expand_sample(hashtag, len(sizes))
+        posts = pd.DataFrame({
+            "post_id": [f"{hashtag}_{i+1:04d}" for i in range(len(sizes))],
+            "hashtag": hashtag,
+            "text": captions,
+            "author_username": [f"user_{x}" for x in rng.integers(1000, 10000, len(sizes))],
+            "likes_count": rng.integers(0, 1001, len(sizes)),
+            "timestamp": pd.Timestamp(now) - pd.to_timedelta(rng.integers(1, 73, len(sizes)), unit="h"),
+            "type": "caption",
+        })
+        df = pd.concat([posts, df], ignore_index=True)
+
+    if out:
+        if out.endswith(".parquet"):
+            df.to_parquet(out, index=False)
+        elif out.endswith(".jsonl"):
+            df.to_json(out, orient="records", lines=True, date_format="iso", force_ascii=False)
+        else:
+            raise ValueError(f"Unsupported output format: {out!r} (use .parquet or .jsonl)")
+    return df
 
 data_collector = InstagramDataCollector()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic comment corpus for load tests.")
+    parser.add_argument("n", type=int, help="number of comments")
+    parser.add_argument("out", help="output path (.parquet or .jsonl)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hashtag", default="synthetic")
+    parser.add_argument("--mix", default="0.4,0.3,0.3", help="positive,neutral,negative shares")
+    parser.add_argument("--hinglish-ratio", type=float, default=None)
+    parser.add_argument("--include-posts", action="store_true")
+    parser.add_argument("--now", default=None, help="ISO time the timestamps count back from (default: CORPUS_EPOCH)")
+    args = parser.parse_args()
+    frame = generate_corpus(args.n, seed=args.seed, hashtag=args.hashtag,
+                            sentiment_mix=tuple(float(x) for x in args.mix.split(",")),
+                            hinglish_ratio=args.hinglish_ratio, include_posts=args.include_posts,
+                            now=datetime.fromisoformat(args.now) if args.now else None, out=args.out)
+    print(f"Wrote {len(frame)} rows to {args.out}")
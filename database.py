@@ -1,11 +1,214 @@
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import config
+
+# Column name -> SQLite type. Item metadata first, then analyzer output.
+COLUMNS = {
+    "run_id": "TEXT",
+    "post_id": "TEXT",
+    "comment_id": "TEXT",
+    "hashtag": "TEXT",
+    "type": "TEXT",
+    "text": "TEXT",
+    "author_username": "TEXT",
+    "likes_count": "INTEGER",
+    "timestamp": "TEXT",
+    "source_url": "TEXT",
+    "sentiment": "TEXT",
+    "confidence": "REAL",
+    "vader_compound": "REAL",
+    "textblob_polarity": "REAL",
+    "language": "TEXT",
+    "language_confidence": "REAL",
+    "clean_text": "TEXT",
+    "translated_text": "TEXT",
+    "used_translation": "INTEGER",
+    "decided_by": "TEXT",
+    "dup_group": "TEXT",
+    "dup_size": "INTEGER",
+}
+
+INDEXES = {
+    "idx_results_hashtag_ts": "hashtag, timestamp",
+    "idx_results_post_id": "post_id",
+    "idx_results_timestamp": "timestamp",
+    "idx_results_sentiment": "sentiment",
+    "idx_results_run_id": "run_id",
+}
+
+INSERT_BATCH = 5000
+
+
+def _to_sql(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):  # also covers pandas.Timestamp
+        return value.isoformat(sep=" ")
+    if hasattr(value, "item"):  # numpy scalars
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
 class DatabaseManager:
-    def __init__(self):
-        self.rows = []
+    """Persistent SQLite store for analyzed items.
+
+    Writes go through ``executemany`` inside a transaction, in WAL mode so the
+    dashboard can read while a run is being saved. Filtering and aggregation
+    happen in SQL; nothing here loads a whole table into memory unless asked to.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or config.DATABASE_PATH
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            cols = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+            conn.execute(f"CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, {cols})")
+            # Databases created by older versions: add any columns they are missing
+            have = {r["name"] for r in conn.execute("PRAGMA table_info(results)")}
+            for name, kind in COLUMNS.items():
+                if name not in have:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {name} {kind}")
+            for name, cols in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON results({cols})")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _fetch(self, sql, params=()):
+        with self._lock:
+            return [dict(r) for r in self._connect().execute(sql, params).fetchall()]
+
+    def insert_results(self, rows, run_id: str | None = None) -> int:
+        """Insert analyzed rows (iterable of dicts or a DataFrame). Returns the row count."""
+        names = list(COLUMNS)
+        if hasattr(rows, "reindex"):
+            frame = rows.assign(run_id=run_id) if run_id is not None else rows
+            records = frame.reindex(columns=names).itertuples(index=False, name=None)
+        else:
+            records = (tuple((run_id if n == "run_id" and run_id is not None else r.get(n)) for n in names)
+                       for r in rows)
+
+        sql = f"INSERT INTO results ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        total = 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                batch = []
+                for rec in records:
+                    batch.append(tuple(_to_sql(v) for v in rec))
+                    if len(batch) >= INSERT_BATCH:
+                        conn.executemany(sql, batch)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    conn.executemany(sql, batch)
+                    total += len(batch)
+        return total
+
+    @staticmethod
+    def _where(hashtag=None, sentiment=None, start=None, end=None, run_id=None):
+        clauses, params = [], []
+        for col, value in (("hashtag", hashtag), ("sentiment", sentiment), ("run_id", run_id)):
+            if value is not None:
+                clauses.append(f"{col} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_sql(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_to_sql(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, hashtag=None, sentiment=None, start=None, end=None, run_id=None, limit: int | None = 1000):
+        where, params = self._where(hashtag, sentiment, start, end, run_id)
+        sql = f"SELECT * FROM results{where} ORDER BY timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self._fetch(sql, params)
+
+    def count(self, hashtag=None, sentiment=None, start=None, end=None, run_id=None) -> int:
+        where, params = self._where(hashtag, sentiment, start, end, run_id)
+        return self._fetch(f"SELECT COUNT(*) AS n FROM results{where}", params)[0]["n"]
+
+    def sentiment_counts(self, hashtag=None, start=None, end=None, run_id=None) -> dict:
+        where, params = self._where(hashtag, None, start, end, run_id)
+        rows = self._fetch(f"SELECT sentiment, COUNT(*) AS n FROM results{where} GROUP BY sentiment", params)
+        return {r["sentiment"]: r["n"] for r in rows}
+
+    def sentiment_counts_by_hashtag(self) -> dict:
+        """{hashtag: {sentiment: count}} in one grouped query."""
+        out = {}
+        for r in self._fetch("SELECT hashtag, sentiment, COUNT(*) AS n FROM results GROUP BY hashtag, sentiment"
+                             " ORDER BY hashtag"):
+            out.setdefault(r["hashtag"], {})[r["sentiment"]] = r["n"]
+        return out
+
+    def sentiment_counts_by_hour(self, hashtag=None, start=None, end=None, run_id=None):
+        """Rows of {hashtag, hour, sentiment, count}, ordered by hashtag and hour."""
+        where, params = self._where(hashtag, None, start, end, run_id)
+        return self._fetch(
+            "SELECT hashtag, strftime('%Y-%m-%d %H:00', timestamp) AS hour, sentiment, COUNT(*) AS count"
+            f" FROM results{where} GROUP BY hashtag, hour, sentiment ORDER BY hashtag, hour",
+            params,
+        )
+
+    def hashtags(self):
+        return [r["hashtag"] for r in self._fetch("SELECT DISTINCT hashtag FROM results ORDER BY hashtag")]
+
+    def get_all(self, limit: int | None = None):
+        return self.query(limit=limit)
+
+    def truncate_run(self, run_id: str, keep: int) -> int:
+        """Keep only the first ``keep`` rows inserted for a run; returns how many were deleted."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM results WHERE run_id = ? AND id NOT IN"
+                    " (SELECT id FROM results WHERE run_id = ? ORDER BY id LIMIT ?)",
+                    (run_id, run_id, int(keep)),
+                )
+            return cur.rowcount
 
-    def insert_results(self, rows):
-        self.rows.extend(rows)
+    def prune_runs(self, keep: int, protect=()) -> int:
+        """Delete the rows of all but the ``keep`` most recently inserted runs, sparing the run ids in
+        ``protect`` (e.g. resumable jobs); returns the rows deleted. Rows without a run id stay."""
+        protect = list(protect)
+        spared = f" AND run_id NOT IN ({', '.join('?' * len(protect))})" if protect else ""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM results WHERE run_id NOT IN (SELECT run_id FROM results WHERE run_id IS NOT NULL"
+                    f" GROUP BY run_id ORDER BY MAX(id) DESC LIMIT ?){spared}",
+                    (int(keep), *protect),
+                )
+            return cur.rowcount
 
-    def get_all(self):
-        return self.rows
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
 db = DatabaseManager()
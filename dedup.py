@@ -0,0 +1,145 @@
+import re
+import zlib
+
+import numpy as np
+
+from config import config
+
+# Words, and every other non-space character (emoji, punctuation) on its own
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Texts that differ in these never share a group: "good" and "not good" are not duplicates.
+# Callers add their sentiment words the same way, so "love it" and "hate it" stay apart too.
+NEGATIONS = frozenset({
+    "no", "not", "never", "nothing", "none", "nor", "cannot", "dont", "don't", "didnt", "didn't", "isnt",
+    "isn't", "wasnt", "wasn't", "aint", "ain't", "won't", "can't", "nahi", "nahin", "nai", "mat", "na",
+    "bilkul", "नहीं", "मत", "ना",
+})
+
+_PRIME = (1 << 61) - 1
+# Bound on the (num_perm x shingles) matrix built per step, in elements
+_BLOCK = 1 << 21
+# In an LSH bucket, each member is compared with this many members before it (and with the first)
+_PAIR_SPAN = 32
+
+
+def _grams(tokens: list, k: int, text: str) -> set:
+    if k > 1 and len(tokens) >= k:
+        tokens = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    return set(tokens) or {text}
+
+
+def shingles(text: str, k: int = 1) -> set:
+    """Lowercased word k-grams; with k=1 a bag of words, so word order doesn't matter."""
+    return _grams(TOKEN_PATTERN.findall(text.lower()), k, text)
+
+
+def minhash_signatures(texts, num_perm: int = 64, k: int = 1, seed: int = 1, key_words=frozenset()):
+    """(len(texts), num_perm) uint32 MinHash signatures, plus a key per text.
+
+    The key stands for the text's negations and words from ``key_words``; texts
+    with different keys must not be grouped.
+    """
+    key_words = NEGATIONS.union(key_words)
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    memo = {}
+    flat, starts, neg = [], [], np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        grams = _grams(tokens, k, text)
+        starts.append(len(flat))
+        for g in grams:
+            h = memo.get(g)
+            if h is None:
+                h = memo[g] = zlib.crc32(g.encode("utf-8"))
+            flat.append(h)
+        neg[i] = hash(frozenset(key_words.intersection(tokens)))
+
+    flat = np.asarray(flat, dtype=np.uint64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.append(starts[1:], len(flat))
+    sig = np.empty((len(texts), num_perm), dtype=np.uint32)
+    # Whole texts per block so reduceat never straddles a block boundary
+    step = max(1, _BLOCK // num_perm)
+    lo = 0
+    while lo < len(texts):
+        hi = max(int(np.searchsorted(ends, starts[lo] + step, side="right")), lo + 1)
+        seg = flat[starts[lo]:ends[hi - 1]]
+        hashed = ((a[:, None] * seg[None, :] + b[:, None]) % _PRIME) & 0xFFFFFFFF
+        sig[lo:hi] = np.minimum.reduceat(hashed, starts[lo:hi] - starts[lo], axis=1).T
+        lo = hi
+    return sig, neg
+
+
+def _find(parent: list, x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def near_duplicate_groups(texts, threshold: float | None = None, num_perm: int | None = None,
+                          bands: int | None = None, k: int | None = None, seed: int = 1,
+                          key_words=frozenset()) -> np.ndarray:
+    """Representative index for every text: the first text of its near-duplicate group.
+
+    Candidates come from LSH banding of MinHash signatures: every pair sharing
+    a bucket (in buckets larger than _PAIR_SPAN, each member's _PAIR_SPAN
+    predecessors and the bucket's first member). A pair matches when its
+    signatures agree on at least ``threshold`` of the positions (an estimate of
+    Jaccard similarity) and both have the same negation words and the same
+    words of ``key_words`` (e.g. the lexicon's sentiment-bearing tokens).
+    Groups are the connected components of matching pairs; since the key must
+    be equal along every link, a group never mixes polarities.
+    """
+    threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+    num_perm = num_perm or config.DEDUP_NUM_PERM
+    bands = bands or config.DEDUP_BANDS
+    k = k or config.DEDUP_SHINGLE_SIZE
+    n = len(texts)
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+
+    sig, neg = minhash_signatures(texts, num_perm, k, seed, key_words)
+    bands = min(bands, num_perm)
+    rows = num_perm // bands
+    pairs = []
+    for band in range(bands):
+        block = np.ascontiguousarray(sig[:, band * rows:(band + 1) * rows])
+        _, bucket = np.unique(block.view(np.dtype((np.void, 4 * rows))).ravel(), return_inverse=True)
+        order = np.argsort(bucket, kind="stable")
+        sorted_bucket = bucket[order]
+        # Members d apart in a bucket, for growing d until no bucket is that large
+        for d in range(1, min(_PAIR_SPAN, n - 1) + 1):
+            same = sorted_bucket[d:] == sorted_bucket[:-d]
+            if not same.any():
+                break
+            pairs.append(np.stack([order[:-d][same], order[d:][same]], axis=1))
+        first = np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]]
+        head = order[first][np.cumsum(first) - 1]  # lowest index of each item's bucket
+        others = order != head
+        if others.any():
+            pairs.append(np.stack([head[others], order[others]], axis=1))
+    if not pairs:
+        return parent
+
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    left, right = pairs[:, 0], pairs[:, 1]
+    agree = (sig[left] == sig[right]).mean(axis=1)
+    keep = (agree >= threshold) & (neg[left] == neg[right])
+
+    # Union-find; the lower index becomes the root, so each group's root is its first text
+    rep = parent.tolist()
+    for x, y in pairs[keep].tolist():
+        rx, ry = _find(rep, x), _find(rep, y)
+        if rx != ry:
+            rep[max(rx, ry)] = min(rx, ry)
+    return np.array([_find(rep, i) for i in range(n)])
+
+
+def group_sizes(rep: np.ndarray) -> np.ndarray:
+    """Size of each item's group, per item."""
+    return np.bincount(rep, minlength=len(rep))[rep]
@@ -0,0 +1,375 @@
+"""Concurrent post fetcher for URL mode.
+
+Usage:
+  python fetcher.py demo [--urls 300] [--concurrency 64] [--latency 0.05,0.4] [--rate-429 0.1] [--check]
+
+"demo" starts a local stub server that answers /p/<shortcode>/ with JSON after
+a random delay and sometimes 429, then fetches --urls URLs (with repeats) and
+reports the elapsed time next to the slowest single response. With --check it
+exits non-zero when a shortcode was served more than once, a refused request
+was not retried, a repeat fetch missed the cache, or the requests did not
+overlap.
+"""
+import argparse
+import asyncio
+import html
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from cache import TTLCache
+from config import config
+
+OG_DESCRIPTION = re.compile(r'<meta[^>]+property=["\']og:description["\'][^>]+content=["\']([^"\']*)', re.I)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_post(body: str, content_type: str = "") -> dict:
+    """Caption and comments from a post response: JSON from an API/stub, or a page's og:description."""
+    if "json" in content_type or body.lstrip().startswith("{"):
+        data = json.loads(body)
+        return {"caption": data.get("caption") or "", "comments": list(data.get("comments") or [])}
+    m = OG_DESCRIPTION.search(body)
+    return {"caption": html.unescape(m.group(1)) if m else "", "comments": []}
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` requests per second with bursts of up to ``burst``. One per host."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _make_session(pool_size: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; sentiment-analyzer)"
+    return session
+
+
+class PostFetcher:
+    """Fetches posts by shortcode with bounded concurrency over one pooled HTTP session.
+
+    Each distinct shortcode is requested once per call and results are kept in a
+    TTL cache. Requests to a host go through its token bucket (``rate`` per
+    second, None for no limit). 429 and 5xx responses and connection errors are
+    retried up to ``retries`` times with jittered exponential backoff, or after
+    the server's Retry-After when it sends one. Failed posts map to None.
+    """
+
+    def __init__(self, url_template: str, concurrency: int = 32, rate: float | None = 10.0, burst: int = 20,
+                 timeout: float = 10.0, retries: int = 3, backoff: float = 0.5,
+                 cache: TTLCache | None = None, session=None):
+        self.url_template = url_template
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.session = session or _make_session(self.concurrency)
+        self.requests = 0
+        self.fetched = 0
+        self.failed = 0
+        self.retried = 0
+        self._limiters = {}
+
+    def url_for(self, shortcode: str) -> str:
+        return self.url_template.format(shortcode=shortcode)
+
+    def _get(self, url: str):
+        r = self.session.get(url, timeout=self.timeout)
+        return r.status_code, r.headers, r.text
+
+    def _delay(self, attempt: int, headers) -> float:
+        retry_after = headers.get("Retry-After") if headers is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        base = self.backoff * (2 ** attempt)
+        return base / 2 + random.uniform(0, base / 2)
+
+    async def _fetch_one(self, code: str, sem, executor):
+        url = self.url_for(code)
+        host = urlparse(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None and self.rate:
+            limiter = self._limiters[host] = RateLimiter(self.rate, self.burst)
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            status, headers, body = None, None, ""
+            async with sem:
+                self.requests += 1
+                try:
+                    status, headers, body = await loop.run_in_executor(executor, self._get, url)
+                except Exception:
+                    pass
+            if status == 200:
+                try:
+                    post = parse_post(body, headers.get("Content-Type", ""))
+                except ValueError:
+                    break
+                self.fetched += 1
+                return post
+            if status is not None and status not in RETRY_STATUSES:
+                break  # 404 and friends won't improve with retries
+            if attempt < self.retries:
+                self.retried += 1
+                await asyncio.sleep(self._delay(attempt, headers))
+        self.failed += 1
+        return None
+
+    async def fetch_many_async(self, shortcodes) -> dict:
+        unique = list(dict.fromkeys(c for c in shortcodes if c))
+        out, pending = {}, []
+        for code in unique:
+            hit = self.cache.get(code) if self.cache is not None else None
+            if hit is not None:
+                out[code] = hit
+            else:
+                pending.append(code)
+        if not pending:
+            return out
+        sem = asyncio.Semaphore(self.concurrency)
+        # Blocking requests calls run on a pool as large as the concurrency limit
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending))) as executor:
+            posts = await asyncio.gather(*(self._fetch_one(c, sem, executor) for c in pending))
+        for code, post in zip(pending, posts):
+            out[code] = post
+            if post is not None and self.cache is not None:
+                self.cache.put(code, post)
+        return out
+
+    def fetch_many(self, shortcodes) -> dict:
+        """Map each distinct shortcode to {"caption", "comments"} (or None if it couldn't be fetched)."""
+        coro = self.fetch_many_async(shortcodes)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        box = {}
+        worker = threading.Thread(target=lambda: box.setdefault("out", asyncio.run(coro)))
+        worker.start()
+        worker.join()
+        return box["out"]
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "fetched": self.fetched, "failed": self.failed, "retried": self.retried,
+                "cache_entries": len(self.cache) if self.cache is not None else 0}
+
+
+def build_fetcher(url_template: str | None = None) -> PostFetcher:
+    return PostFetcher(
+        url_template or config.FETCH_URL_TEMPLATE,
+        concurrency=config.FETCH_CONCURRENCY,
+        rate=config.FETCH_PER_HOST_RATE,
+        burst=config.FETCH_PER_HOST_BURST,
+        timeout=config.FETCH_TIMEOUT,
+        retries=config.FETCH_RETRIES,
+        backoff=config.FETCH_BACKOFF,
+        cache=TTLCache(config.FETCH_CACHE_SIZE, config.FETCH_CACHE_TTL),
+    )
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> PostFetcher:
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = build_fetcher()
+    return _fetcher
+
+
+# ---------------------------- Local stub server ----------------------------
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # hundreds of clients connect at once
+
+
+class StubPostServer:
+    """Local HTTP server answering GET /p/<shortcode>/ with JSON after a random delay.
+
+    ``latency`` is a (min, max) range in seconds; ``rate_429`` is the share of
+    requests refused with 429 and Retry-After ``retry_after``.
+    """
+
+    def __init__(self, latency=(0.05, 0.3), rate_429: float = 0.0, retry_after: float = 0.1,
+                 comments: int = 5, seed: int = 0):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.comments = comments
+        self.hits = {}
+        self.served = {}
+        self.refused = {}
+        self.slowest = 0.0
+        self.total_delay = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url_template(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/p/{{shortcode}}/"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                m = re.match(r"^/p/([A-Za-z0-9_-]+)/?$", self.path)
+                with stub._lock:
+                    delay = stub._rng.uniform(*stub.latency)
+                    refuse = stub._rng.random() < stub.rate_429
+                    code = m.group(1) if m else None
+                    stub.hits[code] = stub.hits.get(code, 0) + 1
+                time.sleep(delay)
+                if m is None:
+                    return self._send(404, {"error": "not found"})
+                with stub._lock:
+                    stub.total_delay += delay
+                    if refuse:
+                        stub.refused[code] = stub.refused.get(code, 0) + 1
+                    else:
+                        stub.slowest = max(stub.slowest, delay)
+                        stub.served[code] = stub.served.get(code, 0) + 1
+                if refuse:
+                    return self._send(429, {"error": "slow down"}, {"Retry-After": str(stub.retry_after)})
+                from data_collector import _random_comment_text
+                rng = random.Random(code)
+                self._send(200, {
+                    "shortcode": code,
+                    "caption": f"Stub caption for {code} {_random_comment_text(rng)}",
+                    "comments": [{"text": _random_comment_text(rng), "author_username": f"cuser_{rng.randint(100, 999)}",
+                                  "likes_count": rng.randint(0, 60), "timestamp": datetime.now().isoformat()}
+                                 for _ in range(stub.comments)],
+                })
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        self._server = _StubHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        return False
+
+
+def _check(server: StubPostServer, fetcher: PostFetcher, posts: dict, elapsed: float, concurrency: int) -> list:
+    """Regressions in dedup, retries, caching and concurrency seen in one demo run."""
+    problems = []
+    twice = [c for c, n in server.served.items() if n > 1]
+    if twice:
+        problems.append(f"{len(twice)} shortcode(s) served more than once, e.g. {twice[0]}")
+    # A refused post is retried until it is served or has used up every attempt
+    given_up = [c for c, n in server.refused.items() if c not in server.served and n <= fetcher.retries]
+    if given_up:
+        problems.append(f"{len(given_up)} refused shortcode(s) not retried, e.g. {given_up[0]}")
+    before = sum(server.hits.values())
+    fetcher.fetch_many([c for c, post in posts.items() if post is not None])
+    if sum(server.hits.values()) != before:
+        problems.append("repeat fetch of the same shortcodes went to the server instead of the cache")
+    if concurrency >= 8 and elapsed > server.total_delay / 4:
+        problems.append(f"took {elapsed:.2f}s for {server.total_delay:.2f}s of server time; requests did not overlap")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    demo = sub.add_parser("demo")
+    demo.add_argument("--urls", type=int, default=300)
+    demo.add_argument("--repeat", type=float, default=0.2, help="share of URLs that repeat an earlier shortcode")
+    demo.add_argument("--concurrency", type=int, default=128)
+    demo.add_argument("--latency", default="0.05,0.4", help="min,max seconds per response")
+    demo.add_argument("--rate-429", type=float, default=0.1)
+    demo.add_argument("--seed", type=int, default=7)
+    demo.add_argument("--check", action="store_true", help="exit 1 if dedup, retries, caching or concurrency regress")
+    args = parser.parse_args(argv)
+
+    from data_collector import data_collector
+    rng = random.Random(args.seed)
+    codes = []
+    for i in range(args.urls):
+        codes.append(rng.choice(codes) if codes and rng.random() < args.repeat else f"Stub{i:06d}")
+    urls = [f"https://www.instagram.com/p/{c}/" for c in codes]
+
+    lo, hi = (float(x) for x in args.latency.split(","))
+    with StubPostServer(latency=(lo, hi), rate_429=args.rate_429, seed=args.seed) as server:
+        fetcher = PostFetcher(server.url_template, concurrency=args.concurrency, rate=None,
+                              backoff=0.05, cache=TTLCache(10000, 600))
+        start = time.perf_counter()
+        posts = fetcher.fetch_many(data_collector.extract_shortcode(u) for u in urls)
+        elapsed = time.perf_counter() - start
+        report = {
+            "urls": len(urls),
+            "distinct_shortcodes": len(posts),
+            "fetched": sum(p is not None for p in posts.values()),
+            "seconds": round(elapsed, 3),
+            "slowest_response_s": round(server.slowest, 3),
+            "server_requests": sum(server.hits.values()),
+            **fetcher.stats(),
+        }
+        problems = _check(server, fetcher, posts, elapsed, args.concurrency) if args.check else []
+    print(json.dumps(report, indent=2))
+    for problem in problems:
+        print(f"check failed: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+# Extensions accepted for comment uploads and bulk inputs
+UPLOAD_TYPES = ["txt", "csv", "jsonl", "ndjson"]
+FORMATS = {".txt": "txt", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Tried in order when no text field is given for CSV/JSONL input
+TEXT_FIELDS = ("text", "comment", "body", "message", "content", "caption")
+
+READ_CHUNK = 1024 * 1024
+
+
+def detect_format(name: str, default: str | None = None) -> str | None:
+    return FORMATS.get(os.path.splitext(name or "")[1].lower(), default)
+
+
+def file_digest(binary) -> str:
+    """sha256 of a seekable binary file, read in chunks; leaves the position at the start."""
+    h = hashlib.sha256()
+    binary.seek(0)
+    for block in iter(lambda: binary.read(READ_CHUNK), b""):
+        h.update(block)
+    binary.seek(0)
+    return h.hexdigest()
+
+
+def text_stream(binary):
+    """Decode a binary file lazily (no full-file string), tolerating bad bytes."""
+    if isinstance(binary, io.RawIOBase):
+        binary = io.BufferedReader(binary, READ_CHUNK)
+    return io.TextIOWrapper(binary, encoding="utf-8", errors="replace", newline="")
+
+
+def iter_jsonl_records(f, stats: dict | None = None):
+    """Dict rows of a JSONL stream; blank, malformed and non-object lines are skipped (and counted)."""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            if stats is not None:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        yield row
+
+
+def iter_csv_records(f):
+    csv.field_size_limit(2 ** 31 - 1)
+    yield from csv.DictReader(f)
+
+
+def iter_records(f, fmt: str, stats: dict | None = None):
+    if fmt == "jsonl":
+        return iter_jsonl_records(f, stats)
+    if fmt == "csv":
+        return iter_csv_records(f)
+    raise ValueError(f"unsupported record format: {fmt}")
+
+
+def pick_text_field(row: dict) -> str | None:
+    for name in TEXT_FIELDS:
+        if name in row:
+            return name
+    lowered = {k.lower(): k for k in row if isinstance(k, str)}
+    for name in TEXT_FIELDS:
+        if name in lowered:
+            return lowered[name]
+    return next(iter(row), None)
+
+
+def iter_texts(f, fmt: str, text_field: str | None = None, stats: dict | None = None):
+    """One text per comment: each line of a TXT file, or one field of each CSV/JSONL record."""
+    if fmt == "txt":
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+        return
+    field = text_field
+    for row in iter_records(f, fmt, stats):
+        if field is None:
+            field = pick_text_field(row)
+        value = row.get(field)
+        if value is None:
+            continue
+        value = str(value).strip()
+        if value:
+            yield value
+
+
+class ProgressFile(io.RawIOBase):
+    """Read-through wrapper that counts bytes consumed, for progress over a file of known size."""
+
+    def __init__(self, binary, size: int | None = None):
+        self._binary = binary
+        self.bytes_read = 0
+        if size is None:
+            try:
+                pos = binary.tell()
+                size = binary.seek(0, os.SEEK_END)
+                binary.seek(pos)
+            except (AttributeError, OSError):
+                size = 0
+        self.size = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        data = self._binary.read(len(buf))
+        n = len(data)
+        buf[:n] = data
+        self.bytes_read += n
+        return n
+
+    @property
+    def fraction(self) -> float:
+        return min(self.bytes_read / self.size, 1.0) if self.size else 0.0
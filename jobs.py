@@ -0,0 +1,332 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from aggregates import SentimentAggregate
+from config import config
+from database import db
+from profiling import Profiler, profiler, use_profiler
+from sentiment_analyzer import analyze_frame, iter_analyze_frame
+from session_store import compact_frame, concat_compact
+
+# Jobs running in this process, by id. Module state outlives Streamlit reruns and sessions,
+# so a manifest that says "running" without an entry here belongs to a process that died.
+_active = {}
+_active_lock = threading.Lock()
+
+
+def active_job(job_id: str):
+    with _active_lock:
+        return _active.get(job_id)
+
+
+class JobStore:
+    """On-disk job manifests and chunk checkpoints, one directory per job.
+
+    ``manifest.json`` holds the job's metadata and counters. ``input-NNNNN`` files
+    are the collected items, one per chunk; ``result-NNNNN`` files are the analyzed
+    chunks (Parquet, or pickle when no Parquet engine is installed). Files are
+    written to a temporary name and renamed, so a crash never leaves half a chunk.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def create(self, job_id: str, meta: dict, replayable: bool = False) -> dict:
+        os.makedirs(self._dir(job_id), exist_ok=True)
+        manifest = {
+            "job_id": job_id,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+            "status": "collecting",
+            "meta": meta,
+            "chunks": 0,
+            "items": 0,
+            "inputs_complete": False,
+            "replayable": replayable,
+            "done_chunks": 0,
+            "done_items": 0,
+            "persisted_rows": 0,
+            "error": None,
+        }
+        self.save(manifest)
+        return manifest
+
+    def load(self, job_id: str) -> dict | None:
+        try:
+            with open(os.path.join(self._dir(job_id), "manifest.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, manifest: dict):
+        manifest["updated_at"] = time.time()
+        path = os.path.join(self._dir(manifest["job_id"]), "manifest.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, default=str)
+        os.replace(path + ".tmp", path)
+
+    def list(self, session: str | None = None) -> list:
+        """Manifests, newest first; with ``session`` only the jobs started by that session."""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [self.load(name) for name in os.listdir(self.root)]
+        manifests = [m for m in manifests if m and (session is None or m["meta"].get("session") == session)]
+        return sorted(manifests, key=lambda m: m["created_at"], reverse=True)
+
+    def _chunk(self, job_id: str, kind: str, i: int) -> str:
+        return os.path.join(self._dir(job_id), f"{kind}-{i:05d}")
+
+    def write_chunk(self, job_id: str, kind: str, i: int, df: pd.DataFrame):
+        base = self._chunk(job_id, kind, i)
+        try:
+            df.to_parquet(base + ".tmp", index=False)
+            os.replace(base + ".tmp", base + ".parquet")
+        except ImportError:
+            df.to_pickle(base + ".tmp")
+            os.replace(base + ".tmp", base + ".pkl")
+
+    def read_chunk(self, job_id: str, kind: str, i: int) -> pd.DataFrame:
+        base = self._chunk(job_id, kind, i)
+        if os.path.exists(base + ".parquet"):
+            return pd.read_parquet(base + ".parquet")
+        return pd.read_pickle(base + ".pkl")
+
+    def delete(self, job_id: str):
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+    def prune(self, keep: int):
+        """Drop the oldest finished jobs beyond ``keep``; unfinished ones stay resumable."""
+        finished = [m for m in self.list() if m["status"] == "done"]
+        for m in finished[keep:]:
+            self.delete(m["job_id"])
+
+
+class BackgroundAnalysis:
+    """Collect -> analyze -> persist loop running on a worker thread.
+
+    ``batches`` is any iterable of item batches (the iter_* collectors). The
+    dashboard polls ``progress()`` and ``snapshot()`` between reruns and picks
+    up ``result()`` once ``done``. ``progress_fn`` overrides the item-count
+    estimate, e.g. bytes read from an upload.
+
+    With a ``store`` the run is a resumable job: every collected chunk is saved,
+    and every analyzed chunk is checkpointed before the manifest counts it as
+    done. ``resume`` picks such a job up after the last committed chunk.
+
+    How collection and analysis interleave depends on ``replayable``. A seeded
+    collector can produce its batches again, so each chunk is analyzed as soon
+    as it is saved; a job interrupted while collecting is resumed with the same
+    ``batches``, skipping the chunks already saved. Other input (an upload, a
+    paste) is saved in full before analysis starts, so once collection has
+    finished the job resumes from the saved chunks alone.
+
+    Stage timings of the run go to the job's own ``profiler``, not the process-wide one.
+    """
+
+    def __init__(self, batches, expected: int | None = None, progress_fn=None, run_id: str | None = None,
+                 persist: bool | None = None, meta: dict | None = None, store: JobStore | None = None,
+                 profile: bool = False, replayable: bool = False):
+        self.batches = batches
+        self.expected = expected
+        self.progress_fn = progress_fn
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.persist = config.PERSIST_RESULTS if persist is None else persist
+        self.meta = dict(meta or {})
+        self.store = store
+        self.manifest = store.create(self.run_id, self.meta, replayable) if store is not None else None
+        self.status = "pending"
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.agg = SentimentAggregate()
+        self.profiler = Profiler(enabled=profile)
+        self._frames = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"analysis-{self.run_id}", daemon=True)
+
+    @classmethod
+    def resume(cls, store: JobStore, job_id: str, batches=None, profile: bool = False):
+        manifest = store.load(job_id)
+        if manifest is None:
+            raise KeyError(job_id)
+        job = cls(batches, expected=manifest["meta"].get("expected"), run_id=job_id, meta=manifest["meta"],
+                  profile=profile)
+        job.store = store
+        job.manifest = manifest
+        return job
+
+    @property
+    def job_id(self) -> str:
+        return self.run_id
+
+    def start(self):
+        self.status = "running"
+        self.started = time.time()
+        with _active_lock:
+            _active[self.run_id] = self
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def phase(self) -> str:
+        if self.manifest is None or self.done:
+            return self.status
+        return "analyzing" if self.manifest["inputs_complete"] else "collecting"
+
+    def _process(self, part: pd.DataFrame):
+        part["timestamp"] = pd.to_datetime(part["timestamp"])
+        if self.persist:
+            with profiler.stage("app.persist", len(part)):
+                db.insert_results(part, run_id=self.run_id)
+        # Kept compact from the start, so holding the run costs about its compacted size
+        part = compact_frame(part)
+        with profiler.stage("app.aggregate", len(part)), self._lock:
+            self._frames.append(part)
+            self.agg.update(part)
+
+    def _run(self):
+        try:
+            with use_profiler(self.profiler):
+                if self.store is None:
+                    self._run_streaming()
+                else:
+                    self._run_checkpointed()
+        except Exception as exc:
+            self.error = exc
+            self.status = "failed"
+        finally:
+            self.finished = time.time()
+            if self.manifest is not None:
+                self.manifest["status"] = self.status
+                self.manifest["error"] = str(self.error) if self.error else None
+                self.store.save(self.manifest)
+            with _active_lock:
+                _active.pop(self.run_id, None)
+
+    def _run_streaming(self):
+        tick = time.perf_counter()
+        for part in iter_analyze_frame(self.batches):
+            # Time spent inside the generator is collection + analysis of this batch
+            if profiler.enabled:
+                profiler.record("app.collect_analyze", time.perf_counter() - tick, len(part))
+            self._process(part)
+            if self._cancel.is_set():
+                self.status = "cancelled"
+                return
+            tick = time.perf_counter()
+        self.status = "done"
+
+    def _analyze_chunk(self, i: int, base: pd.DataFrame, tick: float):
+        m = self.manifest
+        part = pd.concat([base, analyze_frame(base)], axis=1)
+        if profiler.enabled:
+            profiler.record("app.collect_analyze", time.perf_counter() - tick, len(part))
+        self._process(part)
+        self.store.write_chunk(self.run_id, "result", i, part)
+        m["done_chunks"], m["done_items"] = i + 1, m["done_items"] + len(part)
+        m["persisted_rows"] += len(part) if self.persist else 0
+        self.store.save(m)
+
+    def _analyze_saved(self) -> bool:
+        # Input chunks saved but not analyzed yet; False if cancelled
+        m = self.manifest
+        for i in range(m["done_chunks"], m["chunks"]):
+            if self._cancel.is_set():
+                self.status = "cancelled"
+                return False
+            self._analyze_chunk(i, self.store.read_chunk(self.run_id, "input", i), time.perf_counter())
+        return True
+
+    def _run_checkpointed(self):
+        m, store = self.manifest, self.store
+        replayable = m.get("replayable", False)
+        if not m["inputs_complete"] and self.batches is None:
+            raise RuntimeError("job was interrupted while collecting an input that can't be read again; start it again")
+        m["status"] = "analyzing" if m["inputs_complete"] else "collecting"
+        store.save(m)
+        # Chunks committed before a restart: reload them, and drop rows of a chunk
+        # that reached the database but not the manifest
+        for i in range(m["done_chunks"]):
+            part = compact_frame(store.read_chunk(self.run_id, "result", i))
+            with self._lock:
+                self._frames.append(part)
+                self.agg.update(part)
+        if self.persist:
+            db.truncate_run(self.run_id, m["persisted_rows"])
+
+        if not self._analyze_saved():
+            return
+        if not m["inputs_complete"]:
+            tick = time.perf_counter()
+            for i, batch in enumerate(self.batches):
+                if i < m["chunks"]:
+                    continue  # a replayed collector repeats its batches; these are saved already
+                base = pd.DataFrame(batch)
+                with profiler.stage("app.collect", len(batch)):
+                    store.write_chunk(self.run_id, "input", i, base)
+                m["chunks"], m["items"] = i + 1, m["items"] + len(batch)
+                store.save(m)
+                if replayable:
+                    self._analyze_chunk(i, base, tick)
+                if self._cancel.is_set():
+                    self.status = "cancelled"
+                    return
+                tick = time.perf_counter()
+            m["inputs_complete"] = True
+            m["status"] = "analyzing"
+            store.save(m)
+            if not self._analyze_saved():
+                return
+        self.status = "done"
+
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        m = self.manifest
+        if m is not None and m["inputs_complete"]:
+            return min(m["done_items"] / m["items"], 1.0) if m["items"] else 0.0
+        if self.progress_fn is not None:
+            return self.progress_fn()
+        if m is not None:
+            return min(m["items"] / self.expected, 1.0) if self.expected else 0.0
+        return min(self.agg.total / self.expected, 1.0) if self.expected else 0.0
+
+    def snapshot(self) -> dict:
+        """Items so far and their sentiment counts, safe to read while running."""
+        with self._lock:
+            return {"items": self.agg.total, "sentiment_counts": dict(self.agg.sentiment_counts),
+                    "phase": self.phase, "collected": self.manifest["items"] if self.manifest else None}
+
+    def result(self) -> pd.DataFrame | None:
+        """Compact frame of everything analyzed (also partial results after a cancel)."""
+        with self._lock:
+            if not self._frames:
+                return None
+            if len(self._frames) > 1:
+                self._frames = [concat_compact(self._frames)]
+            return self._frames[0]
+
+
+def load_results(store: JobStore, job_id: str) -> pd.DataFrame | None:
+    """All committed result chunks of a job, as one compact frame."""
+    m = store.load(job_id)
+    if not m or not m["done_chunks"]:
+        return None
+    return concat_compact([compact_frame(store.read_chunk(job_id, "result", i)) for i in range(m["done_chunks"])])
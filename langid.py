@@ -0,0 +1,121 @@
+import numpy as np
+
+from config import config
+
+LANGUAGES = ["en", "hi", "hinglish", "mixed"]
+
+# Common romanized Hindi: function words, verbs, fillers. The lexicon's romanized terms are added on top.
+ROMAN_HINDI_WORDS = """
+hai hain ho hoga hogi hota hoti tha thi hu hoon hun nahi nahin nhi kya kyu kyun kyunki kaise kaisa kaisi
+kab kahan kaun kitna kitni jab tab yeh ye woh wo yaha yahan waha wahan mein main mujhe mera meri mere
+tera teri tere tum tumhara aap aapka hum hamara uska uski unka unki iska iski apna apni ka ki ke ko se
+par aur bhi toh bas sirf phir fir abhi kal aaj jaldi sab sabko kuch koi log dost yaar yrr bhai behen didi
+ji haan arre arey accha acha achha thoda zyada bahut bohot bilkul ekdum sach sahi galat matlab samajh
+lagta lagti laga lag raha rahi rahe gaya gayi gaye aaya aayi aaye dekh dekho dekha dekhna kar karo karna
+kiya kiye diya liya gya chahiye sakta sakte sakti jaisa jaise wala wali wale dil zindagi ghar khana paisa
+kaam din raat waqt baat baar pehle baad lekin magar agar ya chalo chal suno bolo bola kaha
+""".split()
+# Everyday English of comment threads, beyond the stop words and VADER's lexicon
+ENGLISH_WORDS = """
+hm hmm ok okay fine cool nice good great fire lit wow yes yeah yep nope wait what why how when where post
+reel video photo pic pics story content caption vibe vibes day night time today tomorrow week people guys
+everyone thanks thank please watch look looks looking see seen saw make made work works working
+better best worse worst totally literally actually honestly probably maybe definitely interesting
+decent overrated underrated boring waste amazing awesome beautiful fantastic terrible disappointing
+bad sad mad meh lol lmao omg idk ngl tbh bruh fr
+""".split()
+# Weight of a listed word relative to one dictionary word when counting n-grams
+STOPWORD_WEIGHT = 20.0
+
+_ALPHABET = 27  # 0 = anything that is not a-z, then a..z
+_TRIGRAMS = _ALPHABET ** 3
+_DEVANAGARI = (0x0900, 0x097F)
+
+
+def _trigram_ids(sym: np.ndarray) -> tuple:
+    # Trigrams centered on each letter; word edges show up as the 0 symbol
+    padded = np.concatenate(([0], sym, [0]))
+    center = np.flatnonzero(sym)
+    ids = padded[center] * _ALPHABET * _ALPHABET + padded[center + 1] * _ALPHABET + padded[center + 2]
+    return center, ids
+
+
+def _counts(words: dict) -> np.ndarray:
+    counts = np.zeros(_TRIGRAMS)
+    for word, weight in words.items():
+        sym = np.frombuffer(word.encode("utf-32-le"), dtype=np.uint32).astype(np.int64) - 96
+        sym[(sym < 1) | (sym > 26)] = 0
+        _, ids = _trigram_ids(sym)
+        np.add.at(counts, ids, weight)
+    return counts
+
+
+class LanguageIdentifier:
+    """Batch language identification: en, hi, hinglish (romanized Hindi) or mixed script.
+
+    Script is decided by the share of Devanagari among a text's letters. Latin
+    text is then scored with a character-trigram naive Bayes model (romanized
+    Hindi vs English, add-one smoothed) whose per-trigram log-likelihood ratios
+    sit in one array, so a whole batch is scored with a few NumPy passes over
+    its code points.
+    """
+
+    def __init__(self, english: dict, hinglish: dict, script_threshold: float = 0.8,
+                 hinglish_threshold: float = 0.5):
+        en, hi = _counts(english) + 1, _counts(hinglish) + 1
+        self.llr = (np.log(hi / hi.sum()) - np.log(en / en.sum())).astype(np.float32)
+        self.script_threshold = script_threshold
+        self.hinglish_threshold = hinglish_threshold
+
+    def identify(self, texts) -> tuple:
+        """(labels, confidence) arrays, one per text; confidence is the chosen label's probability."""
+        n = len(texts)
+        labels = np.full(n, "en", dtype=object)
+        confidence = np.ones(n, dtype=np.float32)
+        if not n:
+            return labels, confidence
+        lowered = [t.lower() for t in texts]  # lower() may change a text's length, so measure after it
+        lengths = np.fromiter((len(t) + 1 for t in lowered), dtype=np.int64, count=n)
+        cp = np.frombuffer("\n".join(lowered).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        text_of = np.repeat(np.arange(n), lengths)[:len(cp)]
+
+        deva = (cp >= _DEVANAGARI[0]) & (cp <= _DEVANAGARI[1]) & (cp != 0x0964) & (cp != 0x0965)
+        sym = cp - 96
+        latin = (sym >= 1) & (sym <= 26)
+        sym[~latin] = 0
+        n_deva = np.bincount(text_of, weights=deva, minlength=n)
+        n_latin = np.bincount(text_of, weights=latin, minlength=n)
+        letters = n_deva + n_latin
+        share = np.divide(n_deva, letters, out=np.zeros(n), where=letters > 0)
+
+        center, ids = _trigram_ids(sym)
+        # Overlapping trigrams are far from independent; a third of the summed evidence keeps
+        # probabilities honest (each letter sits in three trigrams)
+        evidence = np.bincount(text_of[center], weights=self.llr[ids], minlength=n) / 3
+        p_hinglish = 1 / (1 + np.exp(-np.clip(evidence, -30, 30)))
+
+        is_hi = share >= self.script_threshold
+        is_mixed = ~is_hi & (share > 1 - self.script_threshold)
+        is_hinglish = ~is_hi & ~is_mixed & (n_latin > 0) & (p_hinglish >= self.hinglish_threshold)
+        labels[is_hi] = "hi"
+        labels[is_mixed] = "mixed"
+        labels[is_hinglish] = "hinglish"
+        latin_text = ~is_hi & ~is_mixed & (n_latin > 0)
+        confidence[is_hi] = share[is_hi]
+        # Mixed is surest with both scripts well represented
+        confidence[is_mixed] = 1 - np.abs(2 * share[is_mixed] - 1)
+        confidence[latin_text] = np.where(is_hinglish, p_hinglish, 1 - p_hinglish)[latin_text]
+        return labels, np.round(confidence, 3)
+
+
+def build_identifier() -> LanguageIdentifier:
+    """Identifier trained on VADER's English lexicon and stop words vs the romanized Hindi lists."""
+    from lexicon import BOOSTERS, HINDI_LEXICON, NEGATE_AFTER
+    from utils import EN_STOPS
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    english = {w: 1.0 for w in SentimentIntensityAnalyzer().lexicon if w.isalpha()}
+    english.update((w, STOPWORD_WEIGHT) for w in (*EN_STOPS, *ENGLISH_WORDS))
+    roman = [w for w in (*HINDI_LEXICON, *BOOSTERS, *NEGATE_AFTER) if w.isascii()]
+    hinglish = dict.fromkeys(roman, STOPWORD_WEIGHT)
+    hinglish.update((w, STOPWORD_WEIGHT) for w in ROMAN_HINDI_WORDS)
+    return LanguageIdentifier(english, hinglish, config.LANGID_SCRIPT_THRESHOLD, config.LANGID_HINGLISH_THRESHOLD)
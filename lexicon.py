@@ -0,0 +1,192 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# Bump whenever the tables or scoring rules change so cached lexicon results are ignored
+LEXICON_VERSION = "1"
+
+# VADER's constants: booster step, negation scalar, "!" emphasis and the compound normalizer
+B_INCR, B_DECR = 0.293, -0.293
+N_SCALAR = -0.74
+BANG_BOOST, MAX_BANGS = 0.292, 4
+ALPHA = 15.0
+# Booster weight by distance to the sentiment word, and how far negation reaches
+BOOSTER_DISTANCE = (1.0, 0.95, 0.9)
+NEGATE_AFTER_REACH = 2
+
+_WORD = r"[a-z0-9\u0900-\u0963\u0966-\u097F]+(?:'[a-z]+)?"  # Devanagari minus the dandas
+_EMOTICON = r"[:;=8][\-o']?[()\[\]dpo/\\|*]|<3"
+_EMOJI = r"[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]"
+TOKEN_PATTERN = re.compile(f"{_WORD}|{_EMOTICON}|{_EMOJI}|!")
+
+# Romanized and Devanagari Hindi on VADER's -4..4 scale
+HINDI_LEXICON = {
+    "mast": 2.5, "badhiya": 2.6, "badiya": 2.6, "badhia": 2.6, "zabardast": 3.0, "jabardast": 3.0,
+    "shandaar": 3.0, "shandar": 3.0, "kamaal": 2.8, "kamal": 2.8, "jhakaas": 2.8, "dhamaal": 2.4,
+    "accha": 1.9, "acha": 1.9, "achha": 1.9, "achchha": 1.9, "acchi": 1.9, "achhi": 1.9, "achi": 1.9,
+    "sundar": 2.3, "khubsurat": 2.5, "khoobsurat": 2.5, "pyaar": 2.6, "pyar": 2.6, "pasand": 1.9,
+    "khush": 2.2, "khushi": 2.3, "wah": 2.0, "waah": 2.0, "shabash": 2.4, "sahi": 1.2, "theek": 0.6,
+    "thik": 0.6, "vasool": 1.8, "badhai": 2.0,
+    "bakwaas": -2.8, "bakwas": -2.8, "bekaar": -2.4, "bekar": -2.4, "ghatiya": -2.9, "ghatia": -2.9,
+    "bura": -2.2, "buri": -2.2, "ganda": -2.2, "gandi": -2.2, "kharab": -2.3, "kharaab": -2.3,
+    "faltu": -2.0, "bore": -1.3, "pakau": -1.6, "dukh": -2.2, "dukhi": -2.2, "udaas": -1.9, "udas": -1.9,
+    "nafrat": -3.0, "gussa": -2.2,
+    "मस्त": 2.5, "बढ़िया": 2.6, "ज़बरदस्त": 3.0, "जबरदस्त": 3.0, "शानदार": 3.0, "कमाल": 2.8,
+    "अच्छा": 1.9, "अच्छी": 1.9, "अच्छे": 1.9, "सुंदर": 2.3, "सुन्दर": 2.3, "खूबसूरत": 2.5, "प्यार": 2.6,
+    "पसंद": 1.9, "खुश": 2.2, "खुशी": 2.3, "वाह": 2.0, "ठीक": 0.6,
+    "बकवास": -2.8, "बेकार": -2.4, "घटिया": -2.9, "बुरा": -2.2, "बुरी": -2.2, "गंदा": -2.2, "खराब": -2.3,
+    "ख़राब": -2.3, "फालतू": -2.0, "दुख": -2.2, "दुखी": -2.2, "उदास": -1.9, "नफरत": -3.0, "नफ़रत": -3.0,
+    "गुस्सा": -2.2,
+}
+# Social-media senses VADER's lexicon reads differently ("fire" is -1.4 there)
+SLANG = {"fire": 2.2, "lit": 2.4, "overrated": -1.6, "decent": 1.2, "meh": -1.1, "slay": 2.0}
+# Emoji the descriptions score badly or not at all; the rest come from VADER's emoji descriptions
+EMOJI_VALENCE = {
+    "🔥": 2.2, "💯": 2.0, "😍": 3.0, "🥰": 3.0, "✨": 1.5, "👏": 2.0, "🙌": 2.0, "❤": 3.0, "😂": 1.5,
+    "😞": -2.0, "😒": -1.6, "😡": -3.0, "👎": -2.2, "🤦": -1.8, "🥲": -0.8, "🤮": -3.0, "😭": -1.0,
+    "🙂": 0.8, "🤔": 0.0, "😐": -0.3, "🫡": 0.5,
+}
+# Beyond VADER's booster list; covers the collector's INTENSIFIERS ("pretty good", "bahut badhiya")
+BOOSTERS = {
+    "truly": B_INCR, "seriously": B_INCR, "pretty": B_INCR, "bahut": B_INCR, "bohot": B_INCR,
+    "bahot": B_INCR, "bht": B_INCR, "boht": B_INCR, "zyada": B_INCR, "jyada": B_INCR, "ekdum": B_INCR,
+    "bilkul": B_INCR, "kaafi": B_INCR, "kafi": B_INCR, "sabse": B_INCR, "बहुत": B_INCR, "एकदम": B_INCR,
+    "बिल्कुल": B_INCR, "ज़्यादा": B_INCR, "ज्यादा": B_INCR, "काफी": B_INCR, "सबसे": B_INCR,
+    "thoda": B_DECR, "thodi": B_DECR, "थोड़ा": B_DECR, "थोड़ी": B_DECR,
+}
+# Hindi negation follows what it negates: "pasand nahi aaya", "accha nahi hai"
+NEGATE_AFTER = {"nahi", "nahin", "nai", "nhi", "नहीं", "नही"}
+# VADER weighs text before "but" at half and after it at 1.5x
+CONTRAST = {"but", "lekin", "magar", "लेकिन", "मगर"}
+
+
+def _forms(token: str):
+    # Nukta letters come precomposed (ढ़) or as letter + nukta; NFC yields the latter
+    return {token, unicodedata.normalize("NFC", token)}
+
+
+class LexiconScorer:
+    """VADER-style compound scores for whole batches from one precompiled token table.
+
+    Every known token (VADER lexicon words and emoticons, emoji, Hinglish and
+    Devanagari terms) gets an id; valence, booster weight and negation/contrast
+    flags are arrays indexed by id. A batch is tokenized once, then boosters,
+    negation (English before the word, Hindi after it), "but" weighting and "!"
+    emphasis are applied with array shifts, and scores summed per text.
+    """
+
+    def __init__(self, lexicon: dict, boosters: dict, negations, emoji_descriptions: dict | None = None):
+        vocab = {"": 0, "!": 1}
+        rows = {}
+
+        def entry(token):
+            for form in _forms(token):
+                if form not in vocab:
+                    vocab[form] = len(vocab)
+                rows.setdefault(vocab[form], {})
+            return [vocab[f] for f in _forms(token)]
+
+        def assign(table, field):
+            for token, value in table.items():
+                for i in entry(token):
+                    rows[i][field] = value
+
+        assign(lexicon, "valence")
+        for char, description in (emoji_descriptions or {}).items():
+            if len(char) == 1:
+                words = re.findall(_WORD, description.lower())
+                for i in entry(char):
+                    rows[i]["valence"] = sum(lexicon.get(w, 0.0) for w in words)
+        assign(HINDI_LEXICON, "valence")
+        assign(SLANG, "valence")
+        assign(EMOJI_VALENCE, "valence")
+        assign(boosters, "booster")
+        assign(BOOSTERS, "booster")
+        assign(dict.fromkeys(negations, True), "negate_before")
+        assign(dict.fromkeys(NEGATE_AFTER, True), "negate_after")
+        assign(dict.fromkeys(CONTRAST, True), "contrast")
+
+        self.vocab = vocab
+        size = len(vocab)
+        self.valence = np.zeros(size)
+        self.booster = np.zeros(size)
+        self.negate_before = np.zeros(size, dtype=bool)
+        self.negate_after = np.zeros(size, dtype=bool)
+        self.contrast = np.zeros(size, dtype=bool)
+        for i, row in rows.items():
+            self.valence[i] = row.get("valence", 0.0)
+            self.booster[i] = row.get("booster", 0.0)
+            self.negate_before[i] = row.get("negate_before", False)
+            self.negate_after[i] = row.get("negate_after", False)
+            self.contrast[i] = row.get("contrast", False)
+        self.bang = vocab["!"]
+        # Tokens that carry sentiment on their own
+        self.polar_tokens = frozenset(t for t, i in vocab.items() if self.valence[i] != 0)
+
+    def token_ids(self, texts):
+        """Flat token ids of all texts plus the token count of each."""
+        get = self.vocab.get
+        ids, lengths = [], np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            lengths[i] = len(tokens)
+            ids.extend([get(t, 0) for t in tokens])
+        return np.asarray(ids, dtype=np.int64), lengths
+
+    def score_batch(self, texts) -> np.ndarray:
+        """Compound score in [-1, 1] per text."""
+        n = len(texts)
+        ids, lengths = self.token_ids(texts)
+        if not len(ids):
+            return np.zeros(n)
+        text_of = np.repeat(np.arange(n), lengths)
+        starts = np.cumsum(lengths) - lengths
+        pos = np.arange(len(ids)) - starts[text_of]  # index within its text
+        rem = lengths[text_of] - pos - 1  # tokens after it in its text
+
+        def before(k):
+            out = np.zeros_like(ids)
+            out[k:] = ids[:-k]
+            return out, pos >= k
+
+        def after(k):
+            out = np.zeros_like(ids)
+            out[:-k] = ids[k:]
+            return out, rem >= k
+
+        v = self.valence[ids]
+        # A booster that is also a sentiment word ("pretty") only boosts when one follows
+        nxt, ok = after(1)
+        v = np.where((self.booster[ids] != 0) & ok & (self.valence[nxt] != 0), 0.0, v)
+        sign = np.sign(v)
+        boost = np.zeros(len(ids))
+        negated = np.zeros(len(ids), dtype=bool)
+        for k, weight in enumerate(BOOSTER_DISTANCE, start=1):
+            prev, ok = before(k)
+            boost += np.where(ok, self.booster[prev], 0.0) * weight
+            negated |= ok & self.negate_before[prev]
+        for k in range(1, NEGATE_AFTER_REACH + 1):
+            nxt, ok = after(k)
+            negated |= ok & self.negate_after[nxt]
+        v = v + sign * boost
+        v = np.where(negated, v * N_SCALAR, v)
+
+        is_but = self.contrast[ids]
+        if is_but.any():
+            seen = np.cumsum(is_but)
+            seen -= np.r_[0, seen][starts][text_of]  # "but"s up to here within the text
+            has_but = np.bincount(text_of, weights=is_but, minlength=n)[text_of] > 0
+            v = np.where(has_but & (seen == 0), v * 0.5, np.where(seen > 0, v * 1.5, v))
+
+        total = np.bincount(text_of, weights=v, minlength=n)
+        bangs = np.bincount(text_of, weights=ids == self.bang, minlength=n)
+        total += np.sign(total) * np.minimum(bangs, MAX_BANGS) * BANG_BOOST
+        return np.round(np.clip(total / np.sqrt(total * total + ALPHA), -1.0, 1.0), 4)
+
+
+def build_scorer() -> LexiconScorer:
+    """Scorer over VADER's lexicon, boosters, negations and emoji descriptions plus the tables above."""
+    from vaderSentiment import vaderSentiment
+    analyzer = vaderSentiment.SentimentIntensityAnalyzer()
+    return LexiconScorer(analyzer.lexicon, vaderSentiment.BOOSTER_DICT, vaderSentiment.NEGATE, analyzer.emojis)
@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+BUCKET_BOUNDS = [
+    1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4,
+    1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0,
+]
+
+
+def _bucket_label(i: int) -> str:
+    if i >= len(BUCKET_BOUNDS):
+        return f">{BUCKET_BOUNDS[-1]:g}s"
+    bound = BUCKET_BOUNDS[i]
+    return f"<={bound * 1e3:g}ms" if bound >= 1e-3 else f"<={bound * 1e6:g}us"
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "items", "start")
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.items)
+        return False
+
+
+class StageStats:
+    __slots__ = ("calls", "items", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds: float, items: int):
+        self.calls += 1
+        self.items += items
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the histogram bucket holding the q-quantile call."""
+        target = q * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(self.total / self.calls * 1e3, 4) if self.calls else 0.0,
+            "min_ms": round(self.min * 1e3, 4) if self.calls else 0.0,
+            "max_ms": round(self.max * 1e3, 4),
+            "p50_ms": round(self.quantile(0.5) * 1e3, 4),
+            "p95_ms": round(self.quantile(0.95) * 1e3, 4),
+            "items_per_s": round(self.items / self.total, 1) if self.total else None,
+            "histogram": {_bucket_label(i): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Profiler:
+    """Per-stage timers and counters.
+
+    Disabled by default: ``stage()`` then hands back a shared no-op context
+    manager and ``count()`` returns immediately, so instrumented hot paths pay
+    one attribute check. Stats recorded in pool workers stay in those processes.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, items: int = 1):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, items)
+
+    def record(self, name: str, seconds: float, items: int = 1):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.add(seconds, items)
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {name: s.to_dict() for name, s in self._stages.items()},
+                "counters": dict(self._counters),
+            }
+
+
+def merge_snapshots(*snapshots) -> dict:
+    """One snapshot from several profilers' (None entries are skipped); counters add up."""
+    merged = {"stages": {}, "counters": {}}
+    for snap in filter(None, snapshots):
+        merged["stages"].update(snap["stages"])
+        for name, n in snap["counters"].items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + n
+    return merged
+
+
+_default = Profiler(enabled=config.PROFILING_ENABLED)
+_local = threading.local()
+
+
+def current_profiler() -> Profiler:
+    """The profiler active on this thread; the process-wide default unless one was activated."""
+    return getattr(_local, "profiler", _default)
+
+
+def activate(p: Profiler | None):
+    """Make ``p`` this thread's profiler (None restores the default)."""
+    _local.profiler = p if p is not None else _default
+
+
+@contextmanager
+def use_profiler(p: Profiler):
+    prev = current_profiler()
+    activate(p)
+    try:
+        yield p
+    finally:
+        activate(prev)
+
+
+class _ThreadProfiler:
+    """Forwards to the calling thread's profiler, so a job or UI session keeps its own stats."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(current_profiler(), name)
+
+    def __setattr__(self, name, value):
+        setattr(current_profiler(), name, value)
+
+
+profiler = _ThreadProfiler()
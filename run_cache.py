@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from cache import LRUCache
+from config import config
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def run_fingerprint(**inputs) -> str:
+    """Stable key for a run: hash of its inputs as canonical JSON."""
+    blob = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class RunCache:
+    """Finished result frames keyed by run fingerprint.
+
+    The last ``maxsize`` runs stay in memory; every run is also written to
+    ``path`` (Parquet, or pickle when no Parquet engine is installed) with a
+    JSON sidecar for its metadata. Only the ``disk_entries`` most recently used
+    files are kept.
+    """
+
+    def __init__(self, maxsize: int = 8, path: str | None = None, disk_entries: int = 64):
+        self.path = path
+        self.disk_entries = disk_entries
+        self._memory = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def _files(self, key: str):
+        base = os.path.join(self.path, key)
+        return base + ".parquet", base + ".pkl", base + ".json"
+
+    def get(self, key: str):
+        """(frame, meta) for a cached run, or None."""
+        hit = self._memory.get(key)
+        if hit is not None or not self.path:
+            return hit
+        parquet, pkl, meta_path = self._files(key)
+        with self._lock:
+            data = parquet if os.path.exists(parquet) else pkl if os.path.exists(pkl) else None
+            if data is None or not os.path.exists(meta_path):
+                return None
+            try:
+                df = pd.read_parquet(data) if data == parquet else pd.read_pickle(data)
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                return None
+            os.utime(meta_path)  # mark as recently used
+        self._memory.put(key, (df, meta))
+        return df, meta
+
+    def put(self, key: str, df: pd.DataFrame, meta: dict | None = None):
+        meta = dict(meta or {})
+        self._memory.put(key, (df, meta))
+        if not self.path:
+            return
+        parquet, pkl, meta_path = self._files(key)
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            try:
+                df.to_parquet(parquet, index=False)
+            except ImportError:
+                df.to_pickle(pkl)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, default=str)
+            self._prune()
+
+    def _prune(self):
+        metas = [os.path.join(self.path, n) for n in os.listdir(self.path) if n.endswith(".json")]
+        if len(metas) <= self.disk_entries:
+            return
+        metas.sort(key=os.path.getmtime)
+        for meta_path in metas[:len(metas) - self.disk_entries]:
+            self._remove(os.path.basename(meta_path)[:-len(".json")])
+
+    def _remove(self, key: str):
+        for p in self._files(key):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def invalidate(self, key: str):
+        self._memory.discard(key)
+        if self.path:
+            with self._lock:
+                self._remove(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+def build_run_cache() -> RunCache | None:
+    if not config.RUN_CACHE_ENABLED:
+        return None
+    return RunCache(config.RUN_CACHE_ENTRIES, config.RUN_CACHE_DIR, config.RUN_CACHE_DISK_ENTRIES)
@@ -1,17 +1,106 @@
+import math
+import os
 import re
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-try:
-    from googletrans import Translator
-    _translator = Translator()
-except Exception:
-    _translator = None
+import numpy as np
 
-vader = SentimentIntensityAnalyzer()
+from cache import ResultCache, cache_key
+from config import config
+from profiling import profiler
+
+# Heavy state (VADER lexicon, TextBlob/NLTK, translation backend, pandas) is
+# loaded on first use so importing this module stays cheap for CLI, pool-worker
+# and test processes. Call warm_up() to pay the cost up front instead.
+_init_lock = threading.Lock()
+_vader = None
+_textblob = None
+_translator = None
+_lexicon = None
+_langid = None
+
+def get_vader():
+    global _vader
+    if _vader is None:
+        with _init_lock:
+            if _vader is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _vader = SentimentIntensityAnalyzer()
+    return _vader
+
+def get_textblob():
+    global _textblob
+    if _textblob is None:
+        with _init_lock:
+            if _textblob is None:
+                from textblob import TextBlob
+                TextBlob("warm up").sentiment  # loads the pattern lexicon
+                _textblob = TextBlob
+    return _textblob
+
+def get_translator():
+    global _translator
+    if _translator is None:
+        with _init_lock:
+            if _translator is None:
+                from translation import build_stage
+                _translator = build_stage()
+    return _translator
+
+def get_lexicon():
+    global _lexicon
+    if _lexicon is None:
+        with _init_lock:
+            if _lexicon is None:
+                from lexicon import build_scorer
+                _lexicon = build_scorer()
+    return _lexicon
+
+def get_langid():
+    global _langid
+    if _langid is None:
+        with _init_lock:
+            if _langid is None:
+                from langid import build_identifier
+                _langid = build_identifier()
+    return _langid
+
+def warm_up(translation: bool = True):
+    """Load analyzers (and optionally the translation backend) now rather than on first use."""
+    get_langid()
+    if config.ANALYSIS_ENGINE == "lexicon":
+        get_lexicon()
+        return
+    get_vader()
+    get_textblob()
+    if translation:
+        get_translator()
+
+SENTIMENT_LABELS = ["Positive", "Neutral", "Negative"]
+TIER_LABELS = ["vader", "ensemble", "lexicon"]
+LANGUAGE_LABELS = ["en", "hi", "hinglish", "mixed"]
+# Devanagari-heavy text is translated before VADER/TextBlob; with LANGID_ROUTING romanized Hindi
+# and mixed-script text go to the lexicon scorer, which reads them directly
+TRANSLATED_LANGUAGES = ("hi", "mixed")
+LEXICON_LANGUAGES = ("hinglish", "mixed")
+
+# Bump whenever scoring rules change so cached results from older rules are ignored
+ANALYZER_VERSION = "4"
+
+_result_cache = ResultCache(
+    maxsize=config.RESULT_CACHE_SIZE,
+    path=config.RESULT_CACHE_PATH,
+    max_bytes=config.RESULT_CACHE_MAX_BYTES,
+) if config.RESULT_CACHE_ENABLED else None
+
+def detect_languages(texts):
+    """(labels, confidence) arrays over LANGUAGE_LABELS for a batch of texts."""
+    return get_langid().identify(texts)
 
 def detect_language(text: str) -> str:
-    return "hi" if re.search(r"[\u0900-\u097F]", text) else "en"
+    return detect_languages([text])[0][0]
 
 def clean_text(text: str) -> str:
     t = re.sub(r"http\S+|www\S+", "", text)
@@ -21,49 +110,375 @@ def clean_text(text: str) -> str:
     return t
 
 def maybe_translate_to_en(text: str, lang: str):
-    if lang == "en" or not _translator:
-        return None
-    try:
-        res = _translator.translate(text, src="auto", dest="en")
-        return res.text
-    except Exception:
+    if lang == "en":
         return None
+    return get_translator().translate([text]).get(text)
+
+def _cache_version() -> str:
+    # Ensemble settings are part of the key so retuning them never serves stale labels
+    return (f"{ANALYZER_VERSION}:{config.ENSEMBLE_VADER_WEIGHT}:{config.ENSEMBLE_TEXTBLOB_WEIGHT}"
+            f":{config.ENSEMBLE_NEUTRAL_BAND}:{config.LANGID_SCRIPT_THRESHOLD}:{config.LANGID_HINGLISH_THRESHOLD}")
+
+def result_version(mode: str | None = None, cascade_threshold: float | None = None,
+                   engine: str | None = None) -> str:
+    """Everything besides the text that decides an analysis result."""
+    if (engine or config.ANALYSIS_ENGINE) == "lexicon":
+        from lexicon import LEXICON_VERSION
+        return f"{_cache_version()}:lexicon:{LEXICON_VERSION}"
+    mode = mode or config.ANALYSIS_MODE
+    threshold = config.CASCADE_VADER_THRESHOLD if cascade_threshold is None else cascade_threshold
+    return (_cache_version() + (":routed" if config.LANGID_ROUTING else "")
+            + (f":cascade:{threshold}" if mode == "cascade" else ""))
+
+def ensemble_scores(compound, polarity, vader_weight: float | None = None,
+                    textblob_weight: float | None = None, neutral_band: float | None = None):
+    """Vectorized VADER/TextBlob ensemble.
+
+    Returns ``(labels, confidence)`` arrays: the weighted score decides the label
+    (inside +/- ``neutral_band`` is Neutral) and the weighted magnitudes give the
+    confidence. Weights and band default to the ``config.ENSEMBLE_*`` settings.
+    A NaN polarity (TextBlob skipped by the cascade) counts as agreeing with VADER.
+    """
+    vw = config.ENSEMBLE_VADER_WEIGHT if vader_weight is None else vader_weight
+    tw = config.ENSEMBLE_TEXTBLOB_WEIGHT if textblob_weight is None else textblob_weight
+    band = config.ENSEMBLE_NEUTRAL_BAND if neutral_band is None else neutral_band
+    c = np.asarray(compound, dtype=np.float64)
+    p = np.asarray(polarity, dtype=np.float64)
+    p = np.where(np.isnan(p), c, p)
+    w = vw * c + tw * p
+    codes = np.where(w >= band, 0, np.where(w <= -band, 2, 1))
+    labels = np.asarray(SENTIMENT_LABELS, dtype=object)[codes]
+    confidence = np.round(np.abs(c) * vw + np.abs(p) * tw, 3)
+    return labels, confidence
+
+def cache_stats() -> dict:
+    return _result_cache.stats() if _result_cache is not None else {}
+
+def _cacheable(res) -> bool:
+    # A failed translation (including one skipped during the circuit breaker's cooldown) is
+    # transient; don't pin the untranslated score in the cache. Translation switched off is not.
+    return (res["language"] not in TRANSLATED_LANGUAGES or res["used_translation"]
+            or res["decided_by"] in ("vader", "lexicon") or _translation_disabled())
+
+def _translation_disabled() -> bool:
+    from translation import NullBackend
+    return isinstance(get_translator().backend, NullBackend)
 
 def analyze_text(text: str):
-    original = text
-    t = clean_text(original)
-    lang = detect_language(t)
+    return analyze_many([text], workers=1)[0]
 
-    translated = maybe_translate_to_en(t, lang)
-    t_en = translated if translated else t
+def analyze_many(texts, workers: int | None = None, mode: str | None = None,
+                 cascade_threshold: float | None = None, engine: str | None = None):
+    """Analyze texts in order. Cached texts are looked up; the rest are scored,
+    across a process pool when ``workers`` (default ``config.ANALYSIS_WORKERS``) > 1.
+
+    ``mode`` (default ``config.ANALYSIS_MODE``) is "full" or "cascade". In cascade
+    mode VADER runs first and any item with ``|compound| >= cascade_threshold``
+    is decided there; only the ambiguous rest pays for translation and TextBlob.
+    Each result's ``decided_by`` records the tier ("vader", "ensemble" or "lexicon").
+
+    Languages come from the batch identifier (langid.py). Only "hi" and "mixed"
+    text is translated; with ``config.LANGID_ROUTING`` "hinglish" and "mixed"
+    skip VADER/TextBlob and go to the lexicon scorer instead, as does "hi" text
+    that translation is disabled for or fails on. ``engine``
+    (default ``config.ANALYSIS_ENGINE``) "lexicon" sends every text there, in
+    one vectorized pass; its compound is reported as ``vader_compound``.
+    """
+    engine = engine or config.ANALYSIS_ENGINE
+    mode = mode or config.ANALYSIS_MODE
+    threshold = config.CASCADE_VADER_THRESHOLD if cascade_threshold is None else cascade_threshold
+    cascade = mode == "cascade"
+
+    with profiler.stage("analyze.clean_text", len(texts)):
+        cleaned = [clean_text(t) for t in texts]
+    results = [None] * len(cleaned)
+    keys = None
+    if _result_cache is not None:
+        with profiler.stage("analyze.cache_lookup", len(cleaned)):
+            version = result_version(mode, threshold, engine)
+            keys = [cache_key(t, version) for t in cleaned]
+            for i, key in enumerate(keys):
+                hit = _result_cache.get(key)
+                if hit is not None:
+                    results[i] = dict(hit)
+
+    todo = [i for i, r in enumerate(results) if r is None]
+    profiler.count("analyze.cache_hits", len(results) - len(todo))
+    profiler.count("analyze.cache_misses", len(todo))
+    if not todo:
+        return results
+
+    with profiler.stage("analyze.detect_language", len(todo)):
+        langs, lang_conf = detect_languages([cleaned[i] for i in todo])
+    jobs = [(cleaned[i], lang) for i, lang in zip(todo, langs)]
+    computed = [None] * len(jobs)
+    if engine == "lexicon":
+        lexical = list(range(len(jobs)))
+    elif config.LANGID_ROUTING:
+        lexical = [k for k, (_, lang) in enumerate(jobs) if lang in LEXICON_LANGUAGES]
+    else:
+        lexical = []
+    if lexical:
+        with profiler.stage("analyze.lexicon", len(lexical)):
+            compound = get_lexicon().score_batch([jobs[k][0] for k in lexical])
+        for k, c in zip(lexical, compound):
+            computed[k] = _result(jobs[k][0], jobs[k][1], None, float(c), math.nan, "lexicon")
+    profiler.count("analyze.lexicon_routed", len(lexical))
+    pending = [k for k, res in enumerate(computed) if res is None]
+    if cascade and pending:
+        # Tier 1: VADER on the untranslated text; ambiguous items come back as None
+        with profiler.stage("analyze.score_vader_tier", len(pending)):
+            first = _score_jobs([(jobs[k][0], jobs[k][1], None, threshold, True) for k in pending], workers)
+        for k, res in zip(pending, first):
+            computed[k] = res
+        pending = [k for k, res in zip(pending, first) if res is None]
 
-    vs = vader.polarity_scores(t_en)
-    vader_label = "Positive" if vs["compound"] >= 0.05 else "Negative" if vs["compound"] <= -0.05 else "Neutral"
+    transient = set()
+    if pending:
+        # Translate every distinct pending item that needs it in one batched pass, then score
+        need = [jobs[k][0] for k in pending if jobs[k][1] in TRANSLATED_LANGUAGES]
+        with profiler.stage("analyze.translate", len(need)):
+            translated = get_translator().translate(need) if need else {}
+        profiler.count("analyze.translation_requests", len(need))
+        # VADER and TextBlob can't read Devanagari: Hindi left untranslated goes to the lexicon
+        fallback = [k for k in pending if jobs[k][1] == "hi" and not translated.get(jobs[k][0])]
+        if fallback:
+            with profiler.stage("analyze.lexicon", len(fallback)):
+                compound = get_lexicon().score_batch([jobs[k][0] for k in fallback])
+            for k, c in zip(fallback, compound):
+                computed[k] = _result(jobs[k][0], jobs[k][1], None, float(c), math.nan, "lexicon")
+            if not _translation_disabled():
+                transient.update(fallback)
+            pending = [k for k in pending if computed[k] is None]
+        profiler.count("analyze.lexicon_fallback", len(fallback))
+        with profiler.stage("analyze.score", len(pending)):
+            second = _score_jobs([(jobs[k][0], jobs[k][1], translated.get(jobs[k][0])) for k in pending], workers)
+        for k, res in zip(pending, second):
+            computed[k] = res
 
-    tb = TextBlob(t_en)
-    tb_pol = tb.sentiment.polarity
-    tb_label = "Positive" if tb_pol > 0.1 else "Negative" if tb_pol < -0.1 else "Neutral"
+    with profiler.stage("analyze.ensemble", len(computed)):
+        labels, confidence = ensemble_scores([r["vader_compound"] for r in computed],
+                                             [r["textblob_polarity"] for r in computed])
+    fresh = []
+    for k, (i, res, label, conf, lconf) in enumerate(zip(todo, computed, labels, confidence, lang_conf)):
+        res["sentiment"] = label
+        res["confidence"] = float(conf)
+        res["language_confidence"] = float(lconf)
+        results[i] = res
+        if keys is not None and k not in transient and _cacheable(res):
+            fresh.append((keys[i], dict(res)))
+    if fresh:
+        _result_cache.put_many(fresh)
+    return results
 
-    if vader_label == tb_label:
-        final = vader_label
+def _score(t: str, lang: str, translated: str | None, threshold: float | None = None, defer: bool = False):
+    # Raw scores only; labels and confidence come from ensemble_scores over the whole batch.
+    # With a threshold, a decisive VADER compound skips TextBlob (polarity left as NaN);
+    # with defer, an indecisive one returns None so the caller can translate first.
+    t_en = translated if translated else t
+    with profiler.stage("score.vader"):
+        compound = get_vader().polarity_scores(t_en)["compound"]
+    decided_by = "ensemble"
+    if threshold is not None and abs(compound) >= threshold:
+        polarity = math.nan
+        decided_by = "vader"
+    elif defer:
+        return None
     else:
-        final = vader_label if abs(vs["compound"]) >= abs(tb_pol) else tb_label
+        with profiler.stage("score.textblob"):
+            polarity = get_textblob()(t_en).sentiment.polarity
+    return _result(t, lang, translated, compound, polarity, decided_by)
 
-    conf = (abs(vs["compound"]) + abs(tb_pol)) / 2
+def _result(t: str, lang: str, translated: str | None, compound: float, polarity: float, decided_by: str):
     return {
-        "sentiment": final,
-        "confidence": round(conf, 3),
-        "vader_compound": vs["compound"],
-        "textblob_polarity": tb_pol,
+        "sentiment": None,
+        "confidence": None,
+        "vader_compound": compound,
+        "textblob_polarity": polarity,
         "language": lang,
         "clean_text": t,
         "translated_text": translated,
         "used_translation": translated is not None,
+        "decided_by": decided_by,
     }
 
-def batch_analyze(items):
-    results = []
-    for it in items:
-        res = analyze_text(it["text"])
-        results.append({**it, **res})
-    return results
+def batch_analyze(items, workers: int | None = None):
+    results = analyze_many([it["text"] for it in items], workers=workers)
+    return [{**it, **res} for it, res in zip(items, results)]
+
+def analyze_frame(data, text_col: str = "text", workers: int | None = None, mode: str | None = None,
+                  cascade_threshold: float | None = None, dedup: bool | None = None,
+                  engine: str | None = None) -> "pd.DataFrame":
+    """Analyze a sequence of texts (or ``data[text_col]``) and return typed result columns.
+
+    Each distinct text is analyzed once and its result is broadcast back to every
+    row that shares it. With ``dedup`` (default ``config.DEDUP_ENABLED``) near-
+    duplicate texts are grouped too and only each group's representative is
+    scored. ``dup_group`` is the representative's clean text and ``dup_size`` the
+    number of rows in the group. The returned frame shares ``data``'s index so it
+    can be concatenated column-wise with the item metadata.
+    """
+    import pandas as pd
+    if isinstance(data, pd.DataFrame):
+        texts = data[text_col]
+    else:
+        texts = pd.Series(list(data), dtype=object)
+    codes, uniques = pd.factorize(texts.fillna("").astype(str), sort=False)
+    dedup = config.DEDUP_ENABLED if dedup is None else dedup
+
+    n = len(uniques)
+    clean = None
+    rep = np.arange(n)
+    if dedup and n > 1:
+        from dedup import near_duplicate_groups
+        with profiler.stage("analyze.dedup", n):
+            clean = np.array([clean_text(t) for t in uniques], dtype=object)
+            # Only texts with the same sentiment words may share a score
+            rep = near_duplicate_groups(clean, key_words=get_lexicon().polar_tokens)
+    scored = np.flatnonzero(rep == np.arange(n))
+    profiler.count("analyze.near_duplicates", n - len(scored))
+    # Row -> unique text -> representative -> position among the scored texts
+    pos = np.empty(n, dtype=np.int64)
+    pos[scored] = np.arange(len(scored))
+    row_src = pos[rep][codes]
+
+    m = len(scored)
+    sentiment = np.empty(m, dtype=object)
+    language = np.empty(m, dtype=object)
+    language_conf = np.empty(m, dtype=np.float32)
+    rep_clean = np.empty(m, dtype=object)
+    translated = np.empty(m, dtype=object)
+    confidence = np.empty(m, dtype=np.float32)
+    compound = np.empty(m, dtype=np.float32)
+    polarity = np.empty(m, dtype=np.float32)
+    used = np.empty(m, dtype=bool)
+    tier = np.empty(m, dtype=object)
+    for i, res in enumerate(analyze_many(list(uniques[scored]), workers=workers, mode=mode,
+                                         cascade_threshold=cascade_threshold, engine=engine)):
+        sentiment[i] = res["sentiment"]
+        language[i] = res["language"]
+        language_conf[i] = res["language_confidence"]
+        rep_clean[i] = res["clean_text"]
+        translated[i] = res["translated_text"]
+        confidence[i] = res["confidence"]
+        compound[i] = res["vader_compound"]
+        polarity[i] = res["textblob_polarity"]
+        used[i] = res["used_translation"]
+        tier[i] = res["decided_by"]
+    if clean is None:
+        clean = rep_clean[pos]
+
+    return pd.DataFrame({
+        "sentiment": pd.Categorical(sentiment[row_src], categories=SENTIMENT_LABELS),
+        "confidence": confidence[row_src],
+        "vader_compound": compound[row_src],
+        "textblob_polarity": polarity[row_src],
+        "language": pd.Categorical(language[row_src], categories=LANGUAGE_LABELS),
+        "language_confidence": language_conf[row_src],
+        "clean_text": clean[codes],
+        "translated_text": translated[row_src],
+        "used_translation": used[row_src],
+        "decided_by": pd.Categorical(tier[row_src], categories=TIER_LABELS),
+        "dup_group": pd.Categorical(rep_clean[row_src]),
+        "dup_size": np.bincount(row_src, minlength=m)[row_src].astype(np.int32),
+    }, index=texts.index)
+
+def iter_batch_analyze(batches, workers: int | None = None):
+    """Streaming batch_analyze: consume batches of items, yield analyzed batches."""
+    for batch in batches:
+        yield batch_analyze(batch, workers=workers)
+
+def iter_analyze_frame(batches, workers: int | None = None):
+    """Streaming analyze_frame: consume batches of items, yield one metadata+results frame per batch."""
+    import pandas as pd
+    for batch in batches:
+        base = pd.DataFrame(batch)
+        yield pd.concat([base, analyze_frame(base, workers=workers)], axis=1)
+
+# ---------------------------- Process pool ----------------------------
+PARALLEL_MIN_ITEMS = 500
+MIN_CHUNK, MAX_CHUNK = 50, 2000
+
+# One pool shared by every caller (dashboard jobs, service threads). _pool_users counts callers
+# with futures outstanding; the pool is only resized or shut down while it is zero.
+_pool = None
+_pool_workers = 0
+_pool_users = 0
+_pool_lock = threading.Lock()
+
+def resolve_workers(workers: int | None = None) -> int:
+    n = config.ANALYSIS_WORKERS if workers is None else workers
+    return max(1, n or os.cpu_count() or 1)
+
+def _init_worker():
+    # Build analyzer state once per worker instead of once per chunk
+    warm_up(translation=False)
+
+def _score_chunk(jobs):
+    return [_score(*job) for job in jobs]
+
+def _chunk_size(n: int, workers: int) -> int:
+    # About four chunks per worker keeps the pool balanced without tiny tasks
+    return max(MIN_CHUNK, min(MAX_CHUNK, math.ceil(n / (workers * 4))))
+
+def _acquire_pool(workers: int):
+    """The shared pool, registered as in use until _release_pool. A busy pool of another
+    size is reused as is rather than swapped out from under its other callers."""
+    global _pool, _pool_workers, _pool_users
+    with _pool_lock:
+        if _pool is None or (_pool_workers != workers and not _pool_users):
+            if _pool is not None:
+                _pool.shutdown(cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _pool_workers = workers
+        _pool_users += 1
+        return _pool
+
+def _release_pool():
+    global _pool_users
+    with _pool_lock:
+        _pool_users -= 1
+
+def _discard_pool(pool):
+    # A broken pool fails every caller's futures anyway; just stop handing it out
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False)
+
+def shutdown_pool():
+    """Shut the shared pool down, unless a caller still has work on it."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_users:
+            return
+        pool, _pool, _pool_workers = _pool, None, 0
+    pool.shutdown(cancel_futures=True)
+
+def _score_jobs(jobs, workers: int | None = None):
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(jobs) < PARALLEL_MIN_ITEMS:
+        return _score_chunk(jobs)
+    size = _chunk_size(len(jobs), workers)
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    pool = _acquire_pool(workers)
+    try:
+        try:
+            futures = [pool.submit(_score_chunk, c) for c in chunks]
+        except Exception:
+            _discard_pool(pool)
+            return _score_chunk(jobs)
+
+        out = []
+        for chunk, fut in zip(chunks, futures):
+            try:
+                out.extend(fut.result())
+            except Exception as exc:
+                # Worker crashed or the chunk raised: score it here so order and coverage hold
+                if isinstance(exc, BrokenProcessPool):
+                    _discard_pool(pool)
+                out.extend(_score_chunk(chunk))
+        return out
+    finally:
+        _release_pool()
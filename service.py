@@ -0,0 +1,446 @@
+"""Micro-batching HTTP service in front of sentiment_analyzer.
+
+Usage:
+  python service.py serve [--host 127.0.0.1] [--port 8080] [--workers N]
+  python service.py load [--url http://127.0.0.1:8080] [--requests 2000] [--concurrency 64] [--batch 0]
+
+Endpoints:
+  POST /analyze        {"text": "..."}          -> one result
+  POST /analyze/batch  {"texts": ["...", ...]}  -> {"results": [...]}
+  GET  /health                                  -> status and queue depth
+  GET  /metrics                                 -> counters, batch sizes, latency histograms
+
+Concurrent requests are queued item by item and scored together: the batcher
+takes up to --max-batch items, waiting at most --max-wait-ms after the first
+one, and runs a single analyze_many call (pooled across processes for large
+batches). When the queue holds --max-queue items new requests get 503 with
+Retry-After instead of piling up. "load" without --url starts an in-process
+server on a free port and drives it with concurrent keep-alive clients.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import sentiment_analyzer
+from config import config
+from profiling import Profiler
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _json_default(value):
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _finite(value):
+    # NaN/inf would serialize as bare NaN/Infinity, which strict JSON clients reject
+    if hasattr(value, "item") and not isinstance(value, (dict, list, tuple, str)):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(_finite(obj), ensure_ascii=False, allow_nan=False, default=_json_default).encode("utf-8")
+
+
+class MicroBatcher:
+    """Collects queued texts into batches of at most ``max_batch`` and scores each batch in one call.
+
+    A batch closes when it is full or ``max_wait`` seconds after its first item
+    arrived. Batches run one at a time in a worker thread so the event loop keeps
+    accepting requests; ``submit`` raises QueueFull once ``max_queue`` items wait.
+    """
+
+    def __init__(self, max_batch: int = 256, max_wait: float = 0.01, max_queue: int = 10000,
+                 workers: int | None = None):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.max_queue = max(1, max_queue)
+        self.workers = workers
+        self.profiler = Profiler(enabled=True)
+        self.batch_sizes = {}
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, texts) -> list:
+        if self.depth + len(texts) > self.max_queue:
+            self.profiler.count("service.rejected_items", len(texts))
+            raise QueueFull()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in texts]
+        for text, fut in zip(texts, futures):
+            self._queue.put_nowait((text, fut))
+        self.profiler.count("service.items", len(texts))
+        return await asyncio.gather(*futures)
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            live = [(t, f) for t, f in batch if not f.done()]  # skip callers that went away
+            if not live:
+                continue
+            texts = [t for t, _ in live]
+            start = time.perf_counter()
+            try:
+                results = await asyncio.to_thread(sentiment_analyzer.analyze_many, texts, self.workers)
+            except Exception as exc:
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            self.profiler.record("service.batch", time.perf_counter() - start, len(texts))
+            self.batch_sizes[len(texts)] = self.batch_sizes.get(len(texts), 0) + 1
+            for (_, fut), res in zip(live, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+    def metrics(self) -> dict:
+        snap = self.profiler.snapshot()
+        batches = sum(self.batch_sizes.values())
+        items = sum(size * n for size, n in self.batch_sizes.items())
+        return {
+            "queue_depth": self.depth,
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1e3,
+            "batches": batches,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            **snap,
+        }
+
+
+class AnalysisService:
+    def __init__(self, batcher: MicroBatcher, max_request_items: int = 1000):
+        self.batcher = batcher
+        self.max_request_items = max_request_items
+        self.started = time.time()
+        self._server = None
+
+    async def start(self, host: str, port: int):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._respond(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            self._respond(writer, 400, {"error": "malformed request"}, {}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("bad request line")
+        method, target, _ = parts
+        headers = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), urlparse(target).path, headers, body
+
+    def _respond(self, writer, status, payload, extra, keep_alive):
+        body = _dumps(payload)
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            "/analyze": ("POST", self._analyze),
+            "/analyze/batch": ("POST", self._analyze_batch),
+            "/health": ("GET", self._health),
+            "/metrics": ("GET", self._metrics),
+        }
+        if path not in routes:
+            return 404, {"error": f"no route {path}"}, {}
+        want, handler = routes[path]
+        if method != want:
+            return 405, {"error": f"use {want}"}, {"Allow": want}
+        start = time.perf_counter()
+        try:
+            status, payload = await handler(body)
+        except QueueFull:
+            return 503, {"error": "queue full, retry later"}, {"Retry-After": "1"}
+        except Exception as exc:
+            # A failed batch fails every request in it; answer them instead of dropping the connection
+            self.batcher.profiler.count("service.errors")
+            return 500, {"error": f"analysis failed: {type(exc).__name__}: {exc}"}, {}
+        self.batcher.profiler.record(f"service.{path.strip('/').replace('/', '_')}", time.perf_counter() - start)
+        return status, payload, {}
+
+    @staticmethod
+    def _parse(body):
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return None
+
+    async def _analyze(self, body):
+        data = self._parse(body)
+        if not isinstance(data, dict) or not isinstance(data.get("text"), str):
+            return 400, {"error": 'expected {"text": "..."}'}
+        return 200, (await self.batcher.submit([data["text"]]))[0]
+
+    async def _analyze_batch(self, body):
+        data = self._parse(body)
+        texts = data.get("texts") if isinstance(data, dict) else None
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return 400, {"error": 'expected {"texts": ["...", ...]}'}
+        if len(texts) > self.max_request_items:
+            return 413, {"error": f"at most {self.max_request_items} texts per request"}
+        return 200, {"results": await self.batcher.submit(texts) if texts else []}
+
+    async def _health(self, body):
+        return 200, {"status": "ok", "uptime_s": round(time.time() - self.started, 1),
+                     "queue_depth": self.batcher.depth}
+
+    async def _metrics(self, body):
+        return 200, self.batcher.metrics()
+
+
+def build_service(workers: int | None = None, max_batch: int | None = None, max_wait_ms: float | None = None,
+                  max_queue: int | None = None) -> AnalysisService:
+    batcher = MicroBatcher(
+        max_batch=config.SERVICE_MAX_BATCH if max_batch is None else max_batch,
+        max_wait=(config.SERVICE_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1e3,
+        max_queue=config.SERVICE_MAX_QUEUE if max_queue is None else max_queue,
+        workers=workers,
+    )
+    return AnalysisService(batcher, max_request_items=config.SERVICE_MAX_REQUEST_ITEMS)
+
+
+class LocalServer:
+    """Runs a service on its own event loop in a background thread (tests, load runs)."""
+
+    def __init__(self, service: AnalysisService, host: str = "127.0.0.1", port: int = 0):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        self.port = asyncio.run_coroutine_threadsafe(self.service.start(self.host, self.port), self._loop).result()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.service.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        return False
+
+
+# ---------------------------- Load generator ----------------------------
+async def _client(host, port, jobs, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while jobs:
+            path, payload = jobs.pop()
+            body = _dumps(payload)
+            start = time.perf_counter()
+            writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b""):
+                    break
+                if h.lower().startswith(b"content-length:"):
+                    length = int(h.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(url: str, texts, requests: int, concurrency: int, batch: int = 0, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    target = urlparse(url)
+    if batch:
+        jobs = [("/analyze/batch", {"texts": [rng.choice(texts) for _ in range(batch)]}) for _ in range(requests)]
+    else:
+        jobs = [("/analyze", {"text": rng.choice(texts)}) for _ in range(requests)]
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(target.hostname, target.port, jobs, latencies, statuses)
+                           for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3, 2) if latencies else None
+
+    items = statuses.get(200, 0) * (batch or 1)
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "items_per_s": round(items / elapsed, 1) if elapsed else None,
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+def _load_texts(n: int, seed: int):
+    from data_collector import _random_comment_text
+    rng = random.Random(seed)
+    return [_random_comment_text(rng) for _ in range(n)]
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, default=None, help="processes (default: config.ANALYSIS_WORKERS)")
+    common.add_argument("--max-batch", type=int, default=None, help="default: config.SERVICE_MAX_BATCH")
+    common.add_argument("--max-wait-ms", type=float, default=None, help="default: config.SERVICE_MAX_WAIT_MS")
+    common.add_argument("--max-queue", type=int, default=None, help="default: config.SERVICE_MAX_QUEUE")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", parents=[common])
+    serve.add_argument("--host", default=config.SERVICE_HOST)
+    serve.add_argument("--port", type=int, default=config.SERVICE_PORT)
+
+    load = sub.add_parser("load", parents=[common])
+    load.add_argument("--url", default=None, help="target service (default: start one in-process)")
+    load.add_argument("--requests", type=int, default=2000)
+    load.add_argument("--concurrency", type=int, default=64)
+    load.add_argument("--batch", type=int, default=0, help="texts per /analyze/batch call (0: use /analyze)")
+    load.add_argument("--seed", type=int, default=7)
+    load.add_argument("--translation", default="stub", help="backend for the in-process server (default: stub)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        async def serve_main():
+            service = build_service(args.workers, args.max_batch, args.max_wait_ms, args.max_queue)
+            await asyncio.to_thread(sentiment_analyzer.warm_up)
+            port = await service.start(args.host, args.port)
+            print(f"Listening on http://{args.host}:{port}", file=sys.stderr)
+            await service.serve_forever()
+        try:
+            asyncio.run(serve_main())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sentiment_analyzer.shutdown_pool()
+        return 0
+
+    texts = _load_texts(500, args.seed)
+    if args.url:
+        report = asyncio.run(run_load(args.url, texts, args.requests, args.concurrency, args.batch, args.seed))
+    else:
+        config.TRANSLATION_BACKEND = args.translation
+        sentiment_analyzer.warm_up()
+        service = build_service(args.workers, args.max_batch, args.max_wait_ms, args.max_queue)
+        with LocalServer(service) as server:
+            report = asyncio.run(run_load(server.url, texts, args.requests, args.concurrency, args.batch, args.seed))
+            report["server"] = service.batcher.metrics()
+        sentiment_analyzer.shutdown_pool()
+    print(json.dumps(report, indent=2, default=_json_default))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
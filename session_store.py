@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Low-cardinality labels and repeated texts become categoricals (one copy per distinct value)
+CATEGORY_COLUMNS = ("sentiment", "language", "hashtag", "type", "decided_by", "post_id", "dup_group")
+TEXT_COLUMNS = ("text", "clean_text", "translated_text")
+FLOAT_COLUMNS = ("confidence", "vader_compound", "textblob_polarity")
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Memory-compact copy of a result frame: categorical labels, deduplicated text, float32 scores."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORY_COLUMNS or col in TEXT_COLUMNS:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                out[col] = s.astype("category")
+        elif col in FLOAT_COLUMNS:
+            if s.dtype != "float32":
+                out[col] = s.astype("float32")
+        elif col == "likes_count" and s.dtype.kind in "iu" and s.dtype.itemsize > 2:
+            out[col] = pd.to_numeric(s, downcast="integer")
+    # Already compact frames are returned as-is rather than copied
+    return df.assign(**out) if out else df
+
+
+def concat_compact(frames: list) -> pd.DataFrame:
+    """Concatenate compact frames column by column without widening them: categorical columns
+    are merged with union_categoricals instead of falling back to object."""
+    if len(frames) == 1:
+        return frames[0]
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    out = {}
+    for col in columns:
+        parts = [f[col] if col in f.columns else pd.Series(None, index=f.index, dtype=object) for f in frames]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            out[col] = pd.Series(union_categoricals(parts, ignore_order=True))
+        else:
+            out[col] = pd.concat(parts, ignore_index=True)
+    return compact_frame(pd.DataFrame(out))
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+class SessionStore:
+    """Saved result sets under a memory budget.
+
+    Sessions are kept compact in memory in LRU order. When the total goes over
+    ``budget_bytes`` the least recently used ones are spilled to ``spill_dir``
+    (Parquet, or pickle when no Parquet engine is installed) and transparently
+    loaded back by ``get``. The most recent session always stays in memory.
+    """
+
+    def __init__(self, budget_bytes: int, spill_dir: str):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self._memory = OrderedDict()
+        self._sizes = {}
+        self._spilled = {}
+        self._order = []
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ext)
+
+    def put(self, key: str, df: pd.DataFrame):
+        df = compact_frame(df)
+        with self._lock:
+            self._drop_spilled(key)
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            self._sizes[key] = frame_bytes(df)
+            if key not in self._order:
+                self._order.append(key)
+            self._evict()
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            path = self._spilled.get(key)
+            if path is None:
+                return None
+            df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+            self._drop_spilled(key)
+            self._memory[key] = df
+            self._sizes[key] = frame_bytes(df)
+            self._evict()
+            return df
+
+    def _evict(self):
+        while sum(self._sizes.values()) > self.budget_bytes and len(self._memory) > 1:
+            key, df = self._memory.popitem(last=False)
+            del self._sizes[key]
+            os.makedirs(self.spill_dir, exist_ok=True)
+            try:
+                path = self._path(key, ".parquet")
+                df.to_parquet(path, index=False)
+            except ImportError:
+                path = self._path(key, ".pkl")
+                df.to_pickle(path)
+            self._spilled[key] = path
+
+    def _drop_spilled(self, key: str):
+        path = self._spilled.pop(key, None)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def keys(self):
+        return list(self._order)
+
+    def is_spilled(self, key: str) -> bool:
+        return key in self._spilled
+
+    def memory_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._spilled):
+                self._drop_spilled(key)
+            self._memory.clear()
+            self._sizes.clear()
+            self._order.clear()
+
+    def __contains__(self, key):
+        return key in self._memory or key in self._spilled
+
+    def __len__(self):
+        return len(self._order)
+
+    def __bool__(self):
+        return bool(self._order)
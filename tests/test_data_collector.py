@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pandas as pd
+
+from data_collector import data_collector, generate_corpus
+
+
+def test_generate_corpus_is_reproducible():
+    first = generate_corpus(500, seed=3, include_posts=True)
+    second = generate_corpus(500, seed=3, include_posts=True)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_generate_corpus_seed_matters():
+    assert not generate_corpus(200, seed=1)["text"].equals(generate_corpus(200, seed=2)["text"])
+
+
+def test_iter_hashtag_data_repeats_with_seed_and_now():
+    now = datetime(2024, 5, 1, 12)
+    first = list(data_collector.iter_hashtag_data("food", 5, seed=7, now=now, batch_size=50))
+    second = list(data_collector.iter_hashtag_data("food", 5, seed=7, now=now, batch_size=50))
+    assert first == second
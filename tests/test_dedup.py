@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from dedup import group_sizes, near_duplicate_groups
+from sentiment_analyzer import analyze_frame, clean_text, get_lexicon
+
+
+def groups(texts):
+    return near_duplicate_groups([clean_text(t) for t in texts], key_words=get_lexicon().polar_tokens).tolist()
+
+
+@pytest.mark.parametrize("a, b", [
+    ("bro really love this 🔥", "love this 🔥 bro"),
+    ("kya mast reel hai yrr 🔥", "yrr kya mast reel hai 🔥🔥"),
+    ("Amazing food, must try!", "must try, amazing food"),
+])
+def test_near_duplicates_share_a_group(a, b):
+    assert groups([a, b]) == [0, 0]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("I love this song so much", "I hate this song so much"),
+    ("this is good", "this is not good"),
+    ("pasand aaya yrr", "pasand nahi aaya yrr"),
+])
+def test_opposite_sentiments_stay_apart(a, b):
+    assert groups([a, b]) == [0, 1]
+
+
+def test_group_members_need_not_match_the_first_text():
+    texts = ["love this reel bro 🔥", "totally love this reel bro 🔥 fr", "totally love this reel bro 🔥 fr ngl"]
+    rep = groups(texts)
+    assert rep == [0, 0, 0]
+    assert group_sizes(np.array(rep)).tolist() == [3, 3, 3]
+
+
+def test_dedup_keeps_opposite_scores():
+    out = analyze_frame(["I love this song so much", "I hate this song so much"], workers=1, dedup=True)
+    assert out["sentiment"].astype(str).tolist() == ["Positive", "Negative"]
@@ -0,0 +1,71 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import jobs
+from data_collector import data_collector
+from jobs import BackgroundAnalysis, JobStore
+
+
+def _wait(job, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.02)
+    return job
+
+
+def _upload_batches():
+    lines = [f"comment {i} is {'great' if i % 3 else 'awful'} 🔥" for i in range(600)]
+    return data_collector.iter_pasted_comments(lines, batch_size=100, seed=1)
+
+
+def _hashtag_batches():
+    return data_collector.iter_hashtag_data("food", 4, seed=5, now=datetime(2024, 5, 1), batch_size=100)
+
+
+def _cancel_on_call(monkeypatch, n):
+    """Cancel the running job from inside its n-th analyze_frame call."""
+    real, calls = jobs.analyze_frame, []
+
+    def analyze(frame):
+        calls.append(1)
+        if len(calls) == n:
+            for job in list(jobs._active.values()):
+                job.cancel()
+        return real(frame)
+    monkeypatch.setattr(jobs, "analyze_frame", analyze)
+
+
+def _texts(df):
+    return df["text"].tolist(), df["sentiment"].astype(str).tolist()
+
+
+@pytest.mark.parametrize("make, replayable", [(_upload_batches, False), (_hashtag_batches, True)])
+def test_resume_after_cancel_mid_analysis(tmp_path, monkeypatch, make, replayable):
+    store = JobStore(str(tmp_path))
+    reference = _wait(BackgroundAnalysis(make(), persist=False, store=store, replayable=replayable).start()).result()
+
+    _cancel_on_call(monkeypatch, 2)
+    job = _wait(BackgroundAnalysis(make(), persist=False, store=store, replayable=replayable).start())
+    monkeypatch.undo()
+    m = store.load(job.run_id)
+    assert job.status == "cancelled"
+    assert 0 < m["done_chunks"] < len(reference) / 100
+    # Input that can't be replayed was saved in full before any analysis
+    assert m["inputs_complete"] is not replayable
+
+    resumed = _wait(BackgroundAnalysis.resume(store, job.run_id, batches=make() if replayable else None).start())
+    assert resumed.status == "done"
+    assert _texts(resumed.result()) == _texts(reference)
+
+
+def test_unreplayable_job_interrupted_while_collecting_fails_on_resume(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = BackgroundAnalysis(_upload_batches(), persist=False, store=store)
+    job.cancel()
+    _wait(job.start())
+    assert not store.load(job.run_id)["inputs_complete"]
+    resumed = _wait(BackgroundAnalysis.resume(store, job.run_id).start())
+    assert resumed.status == "failed"
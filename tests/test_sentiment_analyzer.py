@@ -0,0 +1,34 @@
+import pytest
+
+import sentiment_analyzer
+from config import config
+from translation import StubBackend, TranslationStage
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(sentiment_analyzer, "_result_cache", None)
+
+
+@pytest.mark.parametrize("mode", ["full", "cascade"])
+def test_hindi_without_translation_uses_the_lexicon(monkeypatch, no_cache, mode):
+    monkeypatch.setattr(config, "TRANSLATION_BACKEND", "none")
+    monkeypatch.setattr(sentiment_analyzer, "_translator", None)
+    res = sentiment_analyzer.analyze_many(["यह बहुत अच्छा है"], workers=1, mode=mode)[0]
+    assert res["language"] == "hi"
+    assert res["decided_by"] == "lexicon"
+    assert res["sentiment"] == "Positive"
+    assert not res["used_translation"]
+
+
+def test_failed_translation_falls_back_without_caching(monkeypatch):
+    stage = TranslationStage(StubBackend(latency=3.0), timeout=0.2, retries=0)
+    monkeypatch.setattr(sentiment_analyzer, "_translator", stage)
+    puts = []
+    monkeypatch.setattr(sentiment_analyzer, "_result_cache",
+                        type("Cache", (), {"get": lambda self, k: None,
+                                           "put_many": lambda self, items: puts.extend(items)})())
+    res = sentiment_analyzer.analyze_text("यह बहुत अच्छा है")
+    assert res["decided_by"] == "lexicon"
+    assert res["sentiment"] == "Positive"
+    assert puts == []
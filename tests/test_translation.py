@@ -0,0 +1,17 @@
+import time
+
+from translation import StubBackend, TranslationStage
+
+
+def test_timeout_bounds_a_slow_backend():
+    stage = TranslationStage(StubBackend(latency=3.0), timeout=0.2, retries=0)
+    start = time.perf_counter()
+    out = stage.translate(["यह अच्छा है"])
+    elapsed = time.perf_counter() - start
+    assert out == {"यह अच्छा है": None}
+    assert elapsed < 1.0
+
+
+def test_translates_within_timeout():
+    stage = TranslationStage(StubBackend(), timeout=1.0)
+    assert stage.translate(["यह अच्छा है"]) == {"यह अच्छा है": "this good is"}
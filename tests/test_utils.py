@@ -0,0 +1,61 @@
+import re
+from collections import Counter
+
+import pytest
+
+from utils import EMOJI_PATTERN, EN_STOPS, HI_STOPS, NOISE, top_words, top_words_by_class
+
+CORPUS = [
+    "Kya mast reel hai yrr! 🔥🔥 #foodie",
+    "Not impressed tbh... waste of time!!!",
+    "यह बहुत अच्छा है! 😍 https://example.com/x?y=1",
+    "Pretty decent, but could be better. @chef_raj what do you think?",
+    "bakwaas 👎 ekdum bakwaas, paisa barbaad",
+    "LOVED it!!! 😂😂 www.insta.com #Delhi #food",
+    "accha tha, lekin thoda zyada meetha 🍰",
+    "Amazing!!! amazing... AMAZING 💯",
+    "खाना ठंडा था 😞 never again",
+    "don't-miss this: spicy+tangy = perfection ✨",
+    "",
+    "🔥",
+]
+LABELS = ["Positive", "Negative", "Positive", "Neutral", "Negative", "Positive",
+          "Neutral", "Positive", "Negative", "Positive", "Neutral", "Positive"]
+
+
+def legacy_top_words(texts, limit=80, keep_emojis=False):
+    # The per-text implementation the tokenizer replaced
+    stops = EN_STOPS | HI_STOPS | NOISE
+    word_counts = Counter()
+    for t in texts:
+        s = re.sub(r"http\S+|www\.\S+", " ", str(t))
+        s = re.sub(r"@\w+", " ", s)
+        s = re.sub(r"#(\w+)", r"\1", s)
+        tokens = []
+        if keep_emojis:
+            tokens.extend(EMOJI_PATTERN.findall(s))
+            s = EMOJI_PATTERN.sub(" ", s)
+        for w in re.split(r"[^a-z\u0900-\u097F]+", s.lower()):
+            if w and w not in stops and len(w) > 2:
+                tokens.append(w)
+        for tok in tokens:
+            word_counts[tok] += 1
+    return dict(word_counts.most_common(limit))
+
+
+@pytest.mark.parametrize("keep_emojis", [False, True])
+@pytest.mark.parametrize("method", ["python", "pandas", "processes"])
+def test_top_words_matches_legacy(method, keep_emojis):
+    texts = CORPUS * 3
+    for limit in (5, 1000):
+        got = top_words(texts, limit=limit, keep_emojis=keep_emojis, method=method, workers=2)
+        expected = legacy_top_words(texts, limit, keep_emojis)
+        assert list(got.items()) == list(expected.items())
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_top_words_by_class_matches_legacy(vectorized):
+    got = top_words_by_class(CORPUS, LABELS, limit=10, keep_emojis=True, vectorized=vectorized)
+    for label in dict.fromkeys(LABELS):
+        texts = [t for t, lab in zip(CORPUS, LABELS) if lab == label]
+        assert list(got[label].items()) == list(legacy_top_words(texts, 10, True).items())
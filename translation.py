@@ -0,0 +1,225 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import ResultCache, cache_key
+from config import config
+
+
+class TranslationBackend:
+    """Translates a batch of texts to English. Return None for items it couldn't translate."""
+
+    name = "base"
+
+    def translate_batch(self, texts):
+        raise NotImplementedError
+
+
+class NullBackend(TranslationBackend):
+    name = "none"
+
+    def translate_batch(self, texts):
+        return [None] * len(texts)
+
+
+class GoogleTransBackend(TranslationBackend):
+    name = "googletrans"
+
+    def __init__(self):
+        from googletrans import Translator
+        self._translator = Translator()
+
+    def translate_batch(self, texts):
+        res = self._translator.translate(list(texts), src="auto", dest="en")
+        if not isinstance(res, list):
+            res = [res]
+        return [r.text if r is not None else None for r in res]
+
+
+# Small word-level glossary so the offline stub produces usable English
+STUB_GLOSSARY = {
+    "यह": "this", "वह": "that", "है": "is", "हैं": "are", "था": "was", "थी": "was", "थे": "were",
+    "बहुत": "very", "अच्छा": "good", "अच्छी": "good", "अच्छे": "good", "सबसे": "most",
+    "स्वादिष्ट": "delicious", "सुंदर": "beautiful", "लाजवाब": "wonderful", "कमाल": "amazing",
+    "पसंद": "like", "नहीं": "not", "बिल्कुल": "at all", "खाना": "food", "का": "of", "की": "of",
+    "के": "of", "में": "in", "पर": "on", "और": "and", "आज": "today", "तक": "till", "मुझे": "I",
+    "आया": "did", "बुरा": "bad", "बेकार": "useless", "क्या": "what", "सोचते": "think", "हो": "you",
+}
+
+
+class StubBackend(TranslationBackend):
+    """Offline backend for tests and local runs.
+
+    Replaces known Hindi words from ``glossary`` and keeps everything else.
+    ``latency`` (seconds per batch) and ``failure_rate`` simulate a slow or flaky service.
+    """
+
+    name = "stub"
+
+    def __init__(self, glossary=None, latency: float = 0.0, failure_rate: float = 0.0, seed: int | None = None):
+        self.glossary = STUB_GLOSSARY if glossary is None else glossary
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def translate_batch(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise RuntimeError("stub translation failure")
+        return [" ".join(self.glossary.get(w, w) for w in t.split()) for t in texts]
+
+
+BACKENDS = {
+    "none": NullBackend,
+    "stub": StubBackend,
+    "googletrans": GoogleTransBackend,
+}
+
+
+def register_backend(name: str, factory):
+    BACKENDS[name] = factory
+
+
+def make_backend(name: str) -> TranslationBackend:
+    try:
+        return BACKENDS[name]()
+    except Exception:
+        # Missing package or unknown name: keep analyzing untranslated
+        return NullBackend()
+
+
+class TranslationStage:
+    """Deduplicating, batched, concurrent translation with a result cache.
+
+    Each batch gets ``timeout`` seconds and up to ``retries`` retries with
+    exponential backoff. After ``max_failures`` consecutive failed batches the
+    stage stops calling the backend for ``cooldown`` seconds, so a dead service
+    costs one timeout rather than one per item. Backend calls run on the stage's
+    own threads: a call that outlives its timeout is abandoned, not waited for.
+    """
+
+    def __init__(self, backend: TranslationBackend, batch_size: int = 25, concurrency: int = 4,
+                 timeout: float = 8.0, retries: int = 2, backoff: float = 0.5,
+                 max_failures: int = 3, cooldown: float = 60.0, cache: ResultCache | None = None):
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.cache = cache
+        self.requested = 0
+        self.translated = 0
+        self.failed = 0
+        self._consecutive_failures = 0
+        self._disabled_until = 0.0
+        # Not asyncio's default executor, which asyncio.run joins before returning
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency * 2, thread_name_prefix="translate")
+
+    @property
+    def available(self) -> bool:
+        return not isinstance(self.backend, NullBackend) and time.monotonic() >= self._disabled_until
+
+    def _key(self, text: str) -> str:
+        return cache_key(text, f"translate:{self.backend.name}")
+
+    def translate(self, texts) -> dict:
+        """Map each distinct text to its English translation (or None)."""
+        coro = self.translate_async(texts)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop (e.g. the HTTP service): run on a private one
+        box = {}
+        worker = threading.Thread(target=lambda: box.setdefault("out", asyncio.run(coro)))
+        worker.start()
+        worker.join()
+        return box["out"]
+
+    async def translate_async(self, texts) -> dict:
+        unique = list(dict.fromkeys(t for t in texts if t))
+        out = {}
+        pending = []
+        for t in unique:
+            hit = self.cache.get(self._key(t)) if self.cache is not None else None
+            if hit is not None:
+                out[t] = hit
+            else:
+                pending.append(t)
+        self.requested += len(pending)
+        if not pending or not self.available:
+            out.update({t: None for t in pending})
+            return out
+
+        sem = asyncio.Semaphore(self.concurrency)
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        results = await asyncio.gather(*(self._run_batch(b, sem) for b in batches))
+
+        fresh = []
+        for batch, translated in zip(batches, results):
+            for t, en in zip(batch, translated):
+                out[t] = en
+                if en:
+                    fresh.append((self._key(t), en))
+        self.translated += len(fresh)
+        self.failed += len(pending) - len(fresh)
+        if fresh and self.cache is not None:
+            self.cache.put_many(fresh)
+        return out
+
+    async def _run_batch(self, batch, sem):
+        async with sem:
+            for attempt in range(self.retries + 1):
+                if not self.available:
+                    break
+                try:
+                    call = asyncio.get_running_loop().run_in_executor(self._executor, self.backend.translate_batch, batch)
+                    res = await asyncio.wait_for(call, self.timeout)
+                    if len(res) == len(batch):
+                        self._consecutive_failures = 0
+                        return list(res)
+                except Exception:
+                    pass
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random() * 0.25))
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.max_failures:
+                self._disabled_until = time.monotonic() + self.cooldown
+            return [None] * len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "requested": self.requested,
+            "translated": self.translated,
+            "failed": self.failed,
+            "available": self.available,
+        }
+
+
+def build_stage(backend: str | TranslationBackend | None = None) -> TranslationStage:
+    if backend is None:
+        backend = config.TRANSLATION_BACKEND
+    if isinstance(backend, str):
+        backend = make_backend(backend)
+    cache = ResultCache(
+        maxsize=config.TRANSLATION_CACHE_SIZE,
+        path=config.TRANSLATION_CACHE_PATH,
+        max_bytes=config.RESULT_CACHE_MAX_BYTES,
+    ) if config.RESULT_CACHE_ENABLED else None
+    return TranslationStage(
+        backend,
+        batch_size=config.TRANSLATION_BATCH_SIZE,
+        concurrency=config.TRANSLATION_CONCURRENCY,
+        timeout=config.TRANSLATION_TIMEOUT,
+        retries=config.TRANSLATION_RETRIES,
+        cache=cache,
+    )
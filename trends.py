@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from config import config
+
+SENTIMENT_SCORES = {"Positive": 1.0, "Neutral": 0.0, "Negative": -1.0}
+
+# Candidate bucket widths, finest first: (pandas frequency, seconds)
+BUCKETS = [
+    ("1min", 60), ("5min", 300), ("15min", 900), ("1h", 3600),
+    ("6h", 6 * 3600), ("1D", 86400), ("7D", 7 * 86400),
+]
+
+
+def choose_bucket(start, end, max_buckets: int | None = None) -> str:
+    """Finest bucket width that spans [start, end] in at most ``max_buckets`` buckets."""
+    max_buckets = max_buckets or config.TREND_MAX_BUCKETS
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds() if start is not None else 0
+    for freq, seconds in BUCKETS:
+        if span / seconds <= max_buckets:
+            return freq
+    return BUCKETS[-1][0]
+
+
+def _scores(sentiment: pd.Series) -> np.ndarray:
+    if isinstance(sentiment.dtype, pd.CategoricalDtype):
+        # Score each category once and index by code instead of mapping every row
+        table = np.array([SENTIMENT_SCORES.get(c, np.nan) for c in sentiment.cat.categories] + [np.nan])
+        return table[sentiment.cat.codes.to_numpy()]
+    return sentiment.map(SENTIMENT_SCORES).to_numpy(dtype=float)
+
+
+def bucket_trend(df: pd.DataFrame, freq: str | None = None, max_buckets: int | None = None) -> pd.DataFrame:
+    """Per-bucket counts and mean sentiment score (-1..1), indexed by bucket start.
+
+    Columns: count, Positive, Neutral, Negative, score_sum, mean_score. Only
+    non-empty buckets are returned. The bucket width is picked from the time
+    span unless ``freq`` is given; the chosen width is in ``.attrs["freq"]``.
+    """
+    ts = pd.to_datetime(df["timestamp"], errors="coerce")
+    score = _scores(df["sentiment"])
+    ok = ts.notna().to_numpy() & ~np.isnan(score)
+    ts, score = ts[ok], score[ok]
+    columns = ["count", *SENTIMENT_SCORES, "score_sum", "mean_score"]
+    if not len(ts):
+        out = pd.DataFrame(columns=columns, dtype=float)
+        out.attrs["freq"] = freq or BUCKETS[0][0]
+        return out
+
+    freq = freq or choose_bucket(ts.min(), ts.max(), max_buckets)
+    bucket = ts.dt.floor(freq).to_numpy()
+    grouped = pd.DataFrame({
+        "bucket": bucket,
+        "count": 1,
+        "Positive": score > 0,
+        "Neutral": score == 0,
+        "Negative": score < 0,
+        "score_sum": score,
+    }).groupby("bucket", sort=True).sum()
+    grouped = grouped.astype({"count": "int64", "Positive": "int64", "Neutral": "int64", "Negative": "int64"})
+    grouped["mean_score"] = grouped["score_sum"] / grouped["count"]
+    grouped.index.name = "timestamp"
+    grouped.attrs["freq"] = freq
+    return grouped[columns]
+
+
+def smooth(trend: pd.DataFrame, window: int) -> pd.Series:
+    """Item-weighted rolling mean over ``window`` buckets: the mean score of all items in the window."""
+    window = max(1, int(window))
+    sums = trend["score_sum"].rolling(window, min_periods=1).sum()
+    counts = trend["count"].rolling(window, min_periods=1).sum()
+    return sums / counts
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` points that keep the visual shape of (x, y)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket is the third triangle vertex
+        cx = x[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean()
+        cy = y[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        out[i + 1] = a
+    return out
+
+
+def downsample(trend: pd.DataFrame, column: str, points: int | None = None) -> pd.DataFrame:
+    """At most ``points`` rows of ``trend``, chosen by LTTB on ``column``."""
+    points = points or config.TREND_POINTS
+    if len(trend) <= points:
+        return trend
+    x = trend.index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    keep = lttb(x, trend[column].to_numpy(dtype=float), points)
+    return trend.iloc[keep]
@@ -10,9 +10,12 @@ def orient_xticks(fig, angle=-30):
     return fig
 
 def build_summary_json(df, label: str):
+    """Summary of a result frame, or of anything with ``to_summary`` (e.g. a SentimentAggregate)."""
+    if hasattr(df, "to_summary"):
+        return df.to_summary(label)
     total = int(len(df))
-    counts = df["sentiment"].value_counts().to_dict()
-    langs = df["language"].value_counts().to_dict()
+    counts = {k: int(v) for k, v in df["sentiment"].value_counts().items() if v}
+    langs = {k: int(v) for k, v in df["language"].value_counts().items() if v}
     avg_conf = float(df["confidence"].mean()) if total else 0.0
     time_min = str(df["timestamp"].min()) if total else None
     time_max = str(df["timestamp"].max()) if total else None
@@ -44,50 +47,133 @@ HI_STOPS = {
 
 NOISE = {"https","http","www","com","amp","rt","via","re","ve"}
 
+# Frozen once at import; top_words only rebuilds it when stop_extra is given
+STOP_WORDS = frozenset(EN_STOPS | HI_STOPS | NOISE)
+
 EMOJI_PATTERN = re.compile(r"[\U0001F300-\U0001FAFF]")
+URL_PATTERN = re.compile(r"http\S+|www\.\S+")
+MENTION_PATTERN = re.compile(r"@\w+")
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+WORD_PATTERN = re.compile(r"[a-z\u0900-\u097F]+")
+
+# Inputs at least this large use the vectorized pandas path in word_counts(method="auto")
+VECTORIZE_MIN_TEXTS = 20000
 
-def top_words(texts, stop_extra=None, limit=80, keep_emojis=False):
+def _stops(stop_extra):
+    return STOP_WORDS | frozenset(stop_extra) if stop_extra else STOP_WORDS
+
+def tokenize(text, keep_emojis=False, stops=STOP_WORDS) -> list:
     """
-    Extract top words from iterable of texts.
+    Tokens of one text, in the order top_words counts them.
     - Removes URLs, mentions, and hashtags symbol while keeping the tag word.
     - Lower-cases and strips punctuation.
-    - Optionally keeps emoji tokens as words.
+    - Optionally keeps emoji tokens as words (emitted before the words).
     """
-    if stop_extra is None:
-        stop_extra = set()
-    stops = set()
-    stops |= EN_STOPS | HI_STOPS | NOISE | set(stop_extra)
+    s = HASHTAG_PATTERN.sub(r"\1", MENTION_PATTERN.sub(" ", URL_PATTERN.sub(" ", str(text))))
+    tokens = []
+    if keep_emojis:
+        tokens = EMOJI_PATTERN.findall(s)
+        if tokens:
+            s = EMOJI_PATTERN.sub(" ", s)
+    tokens.extend(w for w in WORD_PATTERN.findall(s.lower()) if len(w) > 2 and w not in stops)
+    return tokens
 
-    word_counts = Counter()
+def _count_python(texts, keep_emojis, stops) -> Counter:
+    counts = Counter()
     for t in texts:
-        s = str(t)
-        # Remove URLs and mentions, detach hashtags (#tag -> tag)
-        s = re.sub(r"http\S+|www\.\S+", " ", s)
-        s = re.sub(r"@\w+", " ", s)
-        s = re.sub(r"#(\w+)", r"\1", s)
-
-        # Split on non-letters; capture emojis separately if desired
-        tokens = []
-        if keep_emojis:
-            # pull out emojis as separate tokens
-            emojis = EMOJI_PATTERN.findall(s)
-            if emojis:
-                tokens.extend(emojis)
-            # remove emojis from text, continue processing
-            s = EMOJI_PATTERN.sub(" ", s)
+        counts.update(tokenize(t, keep_emojis, stops))
+    return counts
+
+def _count_chunk(args):
+    return _count_python(*args)
+
+def _count_processes(texts, keep_emojis, stops, workers) -> Counter:
+    from concurrent.futures import ProcessPoolExecutor
+    texts = list(texts)
+    size = max(1, -(-len(texts) // (workers * 4)))
+    chunks = [(texts[i:i + size], keep_emojis, stops) for i in range(0, len(texts), size)]
+    counts = Counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Merge in chunk order so ties keep first-seen order, as in the serial path
+        for part in pool.map(_count_chunk, chunks):
+            counts.update(part)
+    return counts
+
+def _token_frame(texts, keep_emojis, stops):
+    """All tokens as one Series (index = position of the source text), in counting order."""
+    import pandas as pd
+    s = pd.Series(list(texts), dtype=object).astype(str)
+    s = s.str.replace(URL_PATTERN, " ", regex=True).str.replace(MENTION_PATTERN, " ", regex=True)
+    s = s.str.replace(HASHTAG_PATTERN, r"\1", regex=True)
+    parts = []
+    if keep_emojis:
+        parts.append(s.str.findall(EMOJI_PATTERN).explode().dropna())
+        s = s.str.replace(EMOJI_PATTERN, " ", regex=True)
+    words = s.str.lower().str.findall(WORD_PATTERN).explode().dropna()
+    parts.append(words[(words.str.len() > 2) & ~words.isin(stops)])
+    # Stable sort keeps a text's emojis ahead of its words
+    return pd.concat(parts).sort_index(kind="mergesort")
+
+def _counter_in_order(tokens) -> Counter:
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(tokens, sort=False)  # uniques in order of appearance
+    return Counter(dict(zip(uniques.tolist(), np.bincount(codes, minlength=len(uniques)).tolist())))
+
+def _count_pandas(texts, keep_emojis, stops) -> Counter:
+    return _counter_in_order(_token_frame(texts, keep_emojis, stops).to_numpy())
+
+def word_counts(texts, stop_extra=None, keep_emojis=False, method="auto", workers=1) -> Counter:
+    """
+    Count words over an iterable of texts (see tokenize).
+    method: "python", "pandas" (vectorized string ops), "processes" (Counter merge
+    across ``workers`` processes) or "auto". Every method returns the same counts
+    in the same first-seen order.
+    """
+    stops = _stops(stop_extra)
+    if method == "auto":
+        texts = texts if hasattr(texts, "__len__") else list(texts)
+        if workers > 1 and len(texts) >= VECTORIZE_MIN_TEXTS:
+            method = "processes"
+        elif len(texts) >= VECTORIZE_MIN_TEXTS:
+            method = "pandas"
+        else:
+            method = "python"
+    if method == "pandas":
+        return _count_pandas(texts, keep_emojis, stops)
+    if method == "processes":
+        return _count_processes(texts, keep_emojis, stops, workers)
+    return _count_python(texts, keep_emojis, stops)
+
+def word_counts_by_class(texts, labels, stop_extra=None, keep_emojis=False, vectorized=None) -> dict:
+    """Word Counters for every label in one pass over (text, label) pairs."""
+    stops = _stops(stop_extra)
+    texts = list(texts)
+    labels = [str(x) for x in labels]
+    if vectorized is None:
+        vectorized = len(texts) >= VECTORIZE_MIN_TEXTS
+    if not vectorized:
+        out = {}
+        for t, lab in zip(texts, labels):
+            counter = out.get(lab)
+            if counter is None:
+                counter = out[lab] = Counter()
+            counter.update(tokenize(t, keep_emojis, stops))
+        return out
+    import pandas as pd
+    tokens = _token_frame(texts, keep_emojis, stops)
+    by_label = pd.Series(labels, dtype=object).to_numpy()[tokens.index.to_numpy()]
+    out = {lab: Counter() for lab in dict.fromkeys(labels)}
+    for lab, toks in pd.Series(tokens.to_numpy(), index=by_label).groupby(level=0, sort=False):
+        out[lab] = _counter_in_order(toks.to_numpy())
+    return out
+
+def top_words(texts, stop_extra=None, limit=80, keep_emojis=False, method="auto", workers=1):
+    """Extract top words from iterable of texts (see word_counts)."""
+    return dict(word_counts(texts, stop_extra=stop_extra, keep_emojis=keep_emojis,
+                            method=method, workers=workers).most_common(limit))
 
-        # Normalize ASCII punctuation to spaces, lowercase
-        s = s.lower()
-        # Keep alphas; split
-        for raw in re.split(r"[^a-z\u0900-\u097F]+", s):
-            w = raw.strip()
-            if not w or w in stops or len(w) <= 2:
-                continue
-            tokens.append(w)
-
-        # Count
-        for tok in tokens:
-            # optional: skip single-emoji noise if desired (keeping for now)
-            word_counts[tok] += 1
-
-    return dict(word_counts.most_common(limit))
+def top_words_by_class(texts, labels, stop_extra=None, limit=80, keep_emojis=False, vectorized=None) -> dict:
+    """{label: top_words(...)} for every label, computed in one pass."""
+    counts = word_counts_by_class(texts, labels, stop_extra=stop_extra, keep_emojis=keep_emojis, vectorized=vectorized)
+    return {lab: dict(c.most_common(limit)) for lab, c in counts.items()}